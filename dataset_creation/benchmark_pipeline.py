@@ -0,0 +1,231 @@
+import argparse
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import cycle, islice
+
+from generate_dataset_reasoning_tier_2 import generate_reasoning_response, generate_tier2_entry, reasoning_templates, topics_explanations
+from generate_dataset_tier_1 import generate_entry
+from generate_dataset_tier_1_batch import generate_lines
+
+DEFAULT_ROWS = [10000, 100000, 1000000]
+
+# Distinct pre-generated rows the serialization and write cases cycle through
+POOL_SIZE = 4096
+
+# Each case takes (rows, seed) and returns a callable that does the measured work
+# and returns the number of bytes it produced (0 for cases that produce objects).
+# Setup such as building input pools happens outside the measured call.
+
+def case_generate_entry(rows, seed):
+    def run():
+        rng = random.Random(seed)
+        for _ in range(rows):
+            generate_entry(rng)
+        return 0
+    return run
+
+def case_generate_tier2_entry(rows, seed):
+    def run():
+        rng = random.Random(seed)
+        for _ in range(rows):
+            generate_tier2_entry(rng)
+        return 0
+    return run
+
+def case_generate_reasoning_response(rows, seed):
+    rng = random.Random(seed)
+    topics = list(topics_explanations)
+    question_types = list(reasoning_templates)
+    cells = [(rng.choice(topics), rng.choice(question_types)) for _ in range(POOL_SIZE)]
+
+    def run():
+        for topic, question_type in islice(cycle(cells), rows):
+            generate_reasoning_response(topic, question_type)
+        return 0
+    return run
+
+def _entry_pool(seed):
+    rng = random.Random(seed)
+    return [generate_entry(rng) if i % 2 else generate_tier2_entry(rng) for i in range(POOL_SIZE)]
+
+def case_json_dumps(rows, seed):
+    pool = _entry_pool(seed)
+
+    def run():
+        size = 0
+        for entry in islice(cycle(pool), rows):
+            size += len(json.dumps(entry)) + 1
+        return size
+    return run
+
+def case_file_write(rows, seed):
+    lines = [json.dumps(entry) + "\n" for entry in _entry_pool(seed)]
+
+    def run():
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        try:
+            with os.fdopen(fd, "w") as f:
+                for line in islice(cycle(lines), rows):
+                    f.write(line)
+            return os.path.getsize(path)
+        finally:
+            os.remove(path)
+    return run
+
+# End to end with the NumPy batch engine, for comparison with the scalar cases
+def case_tier1_batch(rows, seed):
+    def run():
+        size = 0
+        for line in generate_lines(rows, seed):
+            size += len(line) + 1
+        return size
+    return run
+
+CASES = {
+    "generate_entry": case_generate_entry,
+    "generate_tier2_entry": case_generate_tier2_entry,
+    "generate_reasoning_response": case_generate_reasoning_response,
+    "json_dumps": case_json_dumps,
+    "file_write": case_file_write,
+    "tier1_batch": case_tier1_batch,
+}
+
+def _timed(run):
+    start = time.perf_counter()
+    size = run()
+    return time.perf_counter() - start, size
+
+# Peak traced allocation of one call, measured in a separate run because
+# tracemalloc slows the interpreter down too much to time under it
+def _peak_kb(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def _profile(run, path, top):
+    profiler = cProfile.Profile()
+    profiler.runcall(run)
+    profiler.dump_stats(path + ".prof")
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    with open(path + ".txt", "w") as f:
+        f.write(out.getvalue())
+
+def bench(name, rows, seed, repeat=1, memory=True, profile_dir=None, profile_top=25):
+    run = CASES[name](rows, seed)
+    seconds, size = min(_timed(run) for _ in range(repeat))
+    result = {
+        "case": name,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_s": rows / seconds if seconds else 0.0,
+        "bytes": size,
+        "bytes_per_s": size / seconds if seconds else 0.0,
+        "peak_kb": _peak_kb(run) if memory else None,
+    }
+    if profile_dir:
+        _profile(run, os.path.join(profile_dir, f"{name}_{rows}"), profile_top)
+    return result
+
+def _format_rate(value, unit):
+    for scale, prefix in ((1e9, "G"), (1e6, "M"), (1e3, "k")):
+        if value >= scale:
+            return f"{value / scale:.2f} {prefix}{unit}"
+    return f"{value:.0f} {unit}"
+
+def print_result(result):
+    rate = _format_rate(result["bytes_per_s"], "B/s") if result["bytes"] else "-"
+    peak = f"{result['peak_kb']:,.0f} KB" if result["peak_kb"] is not None else "-"
+    print(f"{result['case']:28s} {result['rows']:>9d} {result['seconds']:8.2f}s "
+          f"{_format_rate(result['rows_per_s'], 'rows/s'):>16s} {rate:>12s} {peak:>14s}")
+
+# Throughput changes of matching (case, rows) pairs; a drop larger than
+# `threshold` (a fraction) is a regression
+def compare(baseline, current, threshold):
+    base = {(r["case"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = base.get((result["case"], result["rows"]))
+        if old is None or not old["rows_per_s"]:
+            continue
+        change = result["rows_per_s"] / old["rows_per_s"] - 1
+        flag = "REGRESSION" if change < -threshold else ""
+        if flag:
+            regressions.append(result)
+        memory = ""
+        if result["peak_kb"] is not None and old.get("peak_kb"):
+            memory = f"peak {result['peak_kb'] / old['peak_kb'] - 1:+7.1%}"
+        print(f"{result['case']:28s} {result['rows']:>9d}  rows/s {change:+7.1%}  {memory:13s} {flag}")
+    return regressions
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dataset generation pipeline: throughput, peak allocation and optional cProfile dumps")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="row counts to run every case at")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES), help="cases to run")
+    parser.add_argument("--seed", type=int, default=0, help="seed for every case")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per case; the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--profile", metavar="DIR", help="write cProfile .prof dumps and top-N .txt summaries here")
+    parser.add_argument("--profile-top", type=int, default=25, help="functions listed in each .txt summary")
+    parser.add_argument("--save", metavar="PATH", help="save results as a JSON baseline")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved baseline and fail on throughput regressions")
+    parser.add_argument("--current", metavar="PATH", help="with --compare, use these saved results instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="rows/s drop (fraction) counted as a regression")
+    args = parser.parse_args()
+
+    if any(rows < 1 for rows in args.rows) or args.repeat < 1:
+        parser.error("--rows and --repeat must be >= 1")
+    if args.current and not args.compare:
+        parser.error("--current requires --compare")
+
+    if args.current:
+        current = load_results(args.current)
+    else:
+        if args.profile:
+            os.makedirs(args.profile, exist_ok=True)
+        print(f"{'case':28s} {'rows':>9s} {'time':>9s} {'rows/s':>16s} {'bytes/s':>12s} {'peak alloc':>14s}")
+        results = []
+        for rows in args.rows:
+            for name in args.cases:
+                result = bench(name, rows, args.seed, args.repeat, not args.no_memory, args.profile, args.profile_top)
+                print_result(result)
+                results.append(result)
+        current = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": args.seed,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump(current, f, indent=2)
+            print(f"Saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        print(f"\nAgainst {args.compare} (threshold {args.threshold:.0%}):")
+        regressions = compare(load_results(args.compare), current, args.threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} throughput regressions")
+
+if __name__ == "__main__":
+    main()
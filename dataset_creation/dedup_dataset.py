@@ -0,0 +1,322 @@
+import argparse
+import hashlib
+import json
+import re
+from array import array
+from collections import Counter, defaultdict, deque
+
+import numpy as np
+
+from generate_dataset_reasoning_tier_2 import reasoning_templates, topics_explanations
+
+# MinHash parameters (same universal hashing scheme as datasketch)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Kept-row signatures are stored in blocks of this many rows, so growing the
+# index never copies it and the oldest rows can be dropped a block at a time
+SIGNATURE_CHUNK_ROWS = 4096
+
+# Smallest per-band hash table (a power of two, as probing masks with it)
+_MIN_TABLE_SLOTS = 1024
+
+# User queries emitted by the Tier-2 generator, mapped back to (topic, question_type)
+_tier2_query_patterns = [
+    (re.compile("^" + re.escape(template).replace(re.escape("{}"), "(.+)") + "$"), question_type)
+    for question_type, template in reasoning_templates.items()
+]
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _message_content(entry, role):
+    return "\n".join(m["content"] for m in entry["messages"] if m["role"] == role)
+
+# Exact key: every message, role and content included
+def exact_key(entry):
+    return _hash64(json.dumps([[m["role"], m["content"]] for m in entry["messages"]], ensure_ascii=False))
+
+# Word n-gram shingles over the normalized user + assistant text
+def shingles(entry, size=3):
+    text = _message_content(entry, "user") + " " + _message_content(entry, "assistant")
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+# Groups a row is reported under: intent/primary_journey for Tier-1, topic/question_type for Tier-2
+def group_keys(entry):
+    try:
+        decision = json.loads(_message_content(entry, "assistant"))
+    except ValueError:
+        decision = None
+    if isinstance(decision, dict) and "intent" in decision:
+        return [("intent", decision.get("intent")), ("primary_journey", decision.get("primary_journey"))]
+
+    query = _message_content(entry, "user")
+    for pattern, question_type in _tier2_query_patterns:
+        match = pattern.match(query)
+        if match and match.group(1) in topics_explanations:
+            return [("topic", match.group(1)), ("question_type", question_type)]
+    return [("group", "other")]
+
+# Near-duplicate index over kept rows. Per row and band it stores a 64-bit band
+# key, the id of the previous row with the same key (int32) and 2-4 int32 slots
+# of an open-addressing table kept between a quarter and half full. Together
+# with the uint32 signature that is at most index_row_bytes() per kept row
+# (about 1 KB with the defaults), plus the unfilled part of the newest chunk.
+# With max_rows set, only the most recent max_rows kept rows (up to one chunk
+# more) are indexed.
+class MinHashLSH:
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, seed=1, max_rows=None):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Odd multipliers folding a band's signature values into one 64-bit key
+        self.mix = rng.randint(1, (1 << 61) - 1, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.max_rows = max_rows
+        self.chunk_rows = min(SIGNATURE_CHUNK_ROWS, max_rows) if max_rows else SIGNATURE_CHUNK_ROWS
+        # Signature, band-key and chain chunks; row id i lives at i % chunk_rows
+        # in chunk i // chunk_rows - first_chunk. Ids below `base` have been dropped.
+        self.chunks = []
+        self.key_chunks = []
+        self.next_chunks = []
+        self.first_chunk = 0
+        self.base = 0
+        self.size = 0
+        # Per band: table of row ids (-1 empty) holding the newest row for each
+        # band key, and the number of non-empty slots. Older rows with the same
+        # key are reached through next_chunks.
+        self.tables = [array("i", [-1]) * _MIN_TABLE_SLOTS for _ in range(bands)]
+        self.used = [0] * bands
+        self._last_query = None
+
+    def signature(self, shingle_set):
+        hv = np.fromiter((_hash64(s) & 0xFFFFFFFF for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+        with np.errstate(over="ignore"):
+            phv = (np.outer(self.a, hv) + self.b[:, None]) % _MERSENNE_PRIME
+        return (phv & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        with np.errstate(over="ignore"):
+            h = (signature.reshape(self.bands, self.rows).astype(np.uint64) * self.mix).sum(axis=1, dtype=np.uint64)
+            h ^= h >> np.uint64(31)
+            h *= np.uint64(0x9E3779B97F4A7C15)
+            h ^= h >> np.uint64(29)
+        return h.tolist()
+
+    def _signature_of(self, row_id):
+        return self.chunks[row_id // self.chunk_rows - self.first_chunk][row_id % self.chunk_rows]
+
+    def _band_key_of(self, row_id, band):
+        chunk = self.key_chunks[row_id // self.chunk_rows - self.first_chunk]
+        return chunk[(row_id % self.chunk_rows) * self.bands + band]
+
+    # Linear probe for `key` in a band table. Returns the slot of the newest
+    # live row with that key (or None) and the slot a new row should go to.
+    # Slots of dropped rows act as tombstones.
+    def _probe(self, band, key):
+        table = self.tables[band]
+        mask = len(table) - 1
+        slot = key & mask
+        free = None
+        while True:
+            row = table[slot]
+            if row == -1:
+                return None, slot if free is None else free
+            if row < self.base:
+                if free is None:
+                    free = slot
+            elif self.key_chunks[row // self.chunk_rows - self.first_chunk][(row % self.chunk_rows) * self.bands + band] == key:
+                return slot, slot
+            slot = (slot + 1) & mask
+
+    # Re-insert the live rows of a band table into one sized for them
+    def _rebuild(self, band):
+        live = [row for row in self.tables[band] if row >= self.base]
+        slots = _MIN_TABLE_SLOTS
+        while slots < 2 * (len(live) + 1):
+            slots *= 2
+        table = array("i", [-1]) * slots
+        mask = slots - 1
+        for row in live:
+            slot = self._band_key_of(row, band) & mask
+            while table[slot] != -1:
+                slot = (slot + 1) & mask
+            table[slot] = row
+        self.tables[band] = table
+        self.used[band] = len(live)
+
+    # Return the id of a kept row whose estimated Jaccard similarity reaches the threshold
+    def query(self, signature):
+        seen = set()
+        keys = self._band_keys(signature)
+        probes = []
+        for band, key in enumerate(keys):
+            found, slot = self._probe(band, key)
+            probes.append((found, slot))
+            candidate = self.tables[band][found] if found is not None else -1
+            while candidate >= self.base:
+                if candidate not in seen:
+                    seen.add(candidate)
+                    if np.mean(self._signature_of(candidate) == signature) >= self.threshold:
+                        return candidate
+                candidate = self.next_chunks[candidate // self.chunk_rows - self.first_chunk][(candidate % self.chunk_rows) * self.bands + band]
+        # Nothing matched: remember the probes for inserting this signature next
+        self._last_query = (signature, self.size, keys, probes)
+        return None
+
+    def insert(self, signature):
+        row_id = self.size
+        offset = row_id % self.chunk_rows
+        if offset == 0:
+            self.chunks.append(np.empty((self.chunk_rows, self.num_perm), dtype=np.uint32))
+            self.key_chunks.append(array("Q", bytes(8 * self.chunk_rows * self.bands)))
+            self.next_chunks.append(array("i", [-1]) * (self.chunk_rows * self.bands))
+        last, self._last_query = self._last_query, None
+        if last is not None and last[0] is signature and last[1] == row_id:
+            _, _, keys, probes = last
+        else:
+            keys = self._band_keys(signature)
+            probes = [self._probe(band, key) for band, key in enumerate(keys)]
+        self.chunks[-1][offset] = signature
+        self.key_chunks[-1][offset * self.bands:(offset + 1) * self.bands] = array("Q", keys)
+        self.size += 1
+
+        chain = self.next_chunks[-1]
+        for band, (found, slot) in enumerate(probes):
+            table = self.tables[band]
+            if found is not None:
+                chain[offset * self.bands + band] = table[found]
+            elif table[slot] == -1:
+                self.used[band] += 1
+            table[slot] = row_id
+            if 2 * self.used[band] > len(table):
+                self._rebuild(band)
+
+        if self.max_rows and self.size - (self.first_chunk + 1) * self.chunk_rows >= self.max_rows:
+            self._drop_oldest_chunk()
+
+    # Forget the oldest chunk of rows. Their table slots become tombstones that
+    # later inserts reuse and rebuilds discard; chains stop at the first dropped id.
+    def _drop_oldest_chunk(self):
+        self.chunks.pop(0)
+        self.key_chunks.pop(0)
+        self.next_chunks.pop(0)
+        self.first_chunk += 1
+        self.base = self.first_chunk * self.chunk_rows
+
+# Upper bound on index memory per kept row: signature, band keys and table
+# slots for the LSH index, plus a set entry for the exact index
+EXACT_ROW_BYTES = 80
+
+def index_row_bytes(num_perm=128, bands=16, near=True):
+    lsh = 4 * num_perm + bands * (8 + 4 + 4 * 4) if near else 0
+    return lsh + EXACT_ROW_BYTES
+
+# Stream input to output, dropping exact and near duplicates; returns the report.
+# With max_index_rows set, rows are only compared against the most recent
+# max_index_rows kept rows, which bounds memory at the cost of missing
+# duplicates further apart than that.
+def dedup(input_path, output_path, threshold=0.8, num_perm=128, bands=16, shingle_size=3, near=True, max_index_rows=None):
+    exact_index = set()
+    exact_order = deque()
+    lsh = MinHashLSH(num_perm, bands, threshold, max_rows=max_index_rows) if near else None
+    totals = Counter()
+    groups = defaultdict(lambda: defaultdict(Counter))
+
+    with open(input_path, encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as dst:
+        for line_number, line in enumerate(src, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f"{input_path}:{line_number}: invalid JSON ({exc})") from None
+
+            status = "kept"
+            key = exact_key(entry)
+            if key in exact_index:
+                status = "exact_duplicate"
+            elif lsh is not None:
+                signature = lsh.signature(shingles(entry, shingle_size))
+                if lsh.query(signature) is not None:
+                    status = "near_duplicate"
+                else:
+                    lsh.insert(signature)
+            if status == "kept":
+                exact_index.add(key)
+                if max_index_rows:
+                    exact_order.append(key)
+                    if len(exact_order) > max_index_rows:
+                        exact_index.discard(exact_order.popleft())
+                dst.write(line if line.endswith("\n") else line + "\n")
+
+            totals["rows"] += 1
+            totals[status] += 1
+            for dimension, value in group_keys(entry):
+                groups[dimension][value][status] += 1
+
+    # Rows held by the index at its fullest (a window may run one chunk over)
+    indexed = totals["kept"]
+    if max_index_rows:
+        indexed = min(indexed, max_index_rows + min(SIGNATURE_CHUNK_ROWS, max_index_rows))
+
+    return {
+        "input": input_path,
+        "output": output_path,
+        "totals": dict(totals),
+        "index_bytes_bound": index_row_bytes(num_perm, bands, near) * indexed,
+        "groups": {dimension: {value: dict(c) for value, c in values.items()} for dimension, values in groups.items()},
+    }
+
+def print_report(report):
+    totals = report["totals"]
+    rows = totals.get("rows", 0)
+    kept = totals.get("kept", 0)
+    print(f"Rows read: {rows}")
+    print(f"Exact duplicates dropped: {totals.get('exact_duplicate', 0)}")
+    print(f"Near duplicates dropped: {totals.get('near_duplicate', 0)}")
+    print(f"Rows kept: {kept} ({kept / rows:.1%} of input)" if rows else "Rows kept: 0")
+    print(f"Index memory bound: {report['index_bytes_bound'] / 2**20:.1f} MB")
+    for dimension, values in report["groups"].items():
+        print(f"\nDropped per {dimension}:")
+        for value, counts in sorted(values.items(), key=lambda item: -sum(item[1].values())):
+            dropped = counts.get("exact_duplicate", 0) + counts.get("near_duplicate", 0)
+            print(f"  {value}: {dropped} dropped, {counts.get('kept', 0)} kept")
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop exact and near-duplicate rows from a messages-format JSONL dataset")
+    parser.add_argument("input", help="input JSONL path")
+    parser.add_argument("output", help="deduplicated JSONL path")
+    parser.add_argument("--threshold", type=float, default=0.8, help="estimated Jaccard similarity at which rows count as near duplicates")
+    parser.add_argument("--num-perm", type=int, default=128, help="MinHash permutations")
+    parser.add_argument("--bands", type=int, default=16, help="LSH bands (num-perm must be divisible by it)")
+    parser.add_argument("--shingle-size", type=int, default=3, help="words per shingle")
+    parser.add_argument("--exact-only", action="store_true", help="skip near-duplicate detection")
+    parser.add_argument("--max-index-rows", type=int, default=None,
+                        help="only compare against the most recent N kept rows (index memory is then bounded by N "
+                             "rows). Each indexed row costs at most 4 * num-perm + 28 * bands + 80 bytes "
+                             "(about 1 KB with the defaults, 80 B with --exact-only)")
+    parser.add_argument("--report", help="also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.num_perm % args.bands:
+        parser.error("--num-perm must be divisible by --bands")
+    if args.max_index_rows is not None and args.max_index_rows < 1:
+        parser.error("--max-index-rows must be >= 1")
+
+    report = dedup(args.input, args.output, args.threshold, args.num_perm, args.bands, args.shingle_size, not args.exact_only, args.max_index_rows)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
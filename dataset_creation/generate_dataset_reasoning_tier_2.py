@@ -75,10 +75,13 @@ def generate_reasoning_response(topic, question_type):
     return responses.get(question_type, responses["explanation"])
 
 # Generate diverse Tier-2 entries
-def generate_tier2_entry():
-    topic = random.choice(list(topics_explanations.keys()))
-    question_type = random.choice(list(reasoning_templates.keys()))
-    
+def generate_tier2_entry(rng=random):
+    topic = rng.choice(list(topics_explanations.keys()))
+    question_type = rng.choice(list(reasoning_templates.keys()))
+    return build_tier2_entry(topic, question_type)
+
+# Build the entry for one topic x question type cell
+def build_tier2_entry(topic, question_type):
     user_query = reasoning_templates[question_type].format(topic)
     explanation = topics_explanations[topic]
     
@@ -104,15 +107,19 @@ def generate_tier2_entry():
     }
     return entry
 
-# Generate 3000 diverse entries for Tier-2
-tier2_entries = [generate_tier2_entry() for _ in range(3000)]
+def main():
+    # Generate 3000 diverse entries for Tier-2
+    tier2_entries = [generate_tier2_entry() for _ in range(3000)]
+
+    # Write to file
+    with open("tier2_reasoning_dataset_3k.jsonl", "w") as f:
+        for entry in tier2_entries:
+            f.write(json.dumps(entry) + "\n")
 
-# Write to file
-with open("tier2_reasoning_dataset_3k.jsonl", "w") as f:
-    for entry in tier2_entries:
-        f.write(json.dumps(entry) + "\n")
+    print("Generated 3000 diverse Tier-2 reasoning entries in tier2_reasoning_dataset_3k.jsonl")
+    print(f"Topics covered: {len(topics_explanations)}")
+    print(f"Question types: {len(reasoning_templates)}")
+    print("Dataset is now ready for fine-tuning with diverse topics and reasoning patterns.")
 
-print("Generated 3000 diverse Tier-2 reasoning entries in tier2_reasoning_dataset_3k.jsonl")
-print(f"Topics covered: {len(topics_explanations)}")
-print(f"Question types: {len(reasoning_templates)}")
-print("Dataset is now ready for fine-tuning with diverse topics and reasoning patterns.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
+import argparse
 import json
+import os
 import random
+import shutil
+from multiprocessing import Pool
 
 # Define agents and their intents
 agents = {
@@ -21,6 +25,8 @@ agents = {
     "god_mode": ["complex_planning", "multi_domain", "comprehensive_help"]
 }
 
+agent_journeys = list(agents.keys())
+
 # Simple Q&A intents with proper answers
 simple_qa = [
     ("fact_lookup", "general_qa", ["general_qa"], "Stockholm"),
@@ -37,74 +43,88 @@ direct_answers = {
     "calculation_simple": ["30", "99", "56", "90", "3", "10", "12", "25"]
 }
 
+# Query templates per intent (built once, not on every call)
+query_templates = {
+    "youtube_search": ["Find videos about {}", "Show me {} videos", "YouTube {}"],
+    "flight_search": ["Flights from {} to {}", "Book flight to {}", "Flight prices to {}"],
+    "hotel_booking": ["Book hotel in {}", "Hotel for {} nights in {}", "Accommodation in {}"],
+    "tech_support": ["My {} is not working", "Help with {} setup", "{} troubleshooting"],
+    "wellness": ["{} tips", "How to improve {}", "Advice on {}"],
+    "financial_wellness": ["{} planning", "Help with {}", "Advice on {}"],
+    "math_solver": ["Calculate {}", "Solve {}", "Math problem: {}"],
+    "ride_booking": ["Book Uber to {}", "Ride to {}", "Taxi from {} to {}"],
+    "calendar_management": ["Schedule meeting {}", "Add to calendar {}", "Calendar for {}"],
+    "complex_planning": ["Plan a trip to {}", "Help with {} and {}", "Comprehensive {}"]
+}
+
+query_topics = ["Paris", "math", "wifi", "sleep", "budget", "family", "deals", "delivery", "algebra", "bus", "concert", "meeting", "sports", "everything"]
+
+# Fields that may be reported as missing
+possible_missing = ["date", "location", "guests", "budget", "details"]
+
+router_system_prompt = "You are Arny's Tier-1 Router Model.\n\nYour job:\n- Decide what should happen next for a user query\n- Output STRICT JSON using the agreed schema\n- Answer directly ONLY if the answer is atomic\n- Never explain\n- Never chat\n- Ask clarification ONLY if required fields are missing"
+
 # Generate user queries
-def generate_query(intent, journey):
-    templates = {
-        "youtube_search": ["Find videos about {}", "Show me {} videos", "YouTube {}"],
-        "flight_search": ["Flights from {} to {}", "Book flight to {}", "Flight prices to {}"],
-        "hotel_booking": ["Book hotel in {}", "Hotel for {} nights in {}", "Accommodation in {}"],
-        "tech_support": ["My {} is not working", "Help with {} setup", "{} troubleshooting"],
-        "wellness": ["{} tips", "How to improve {}", "Advice on {}"],
-        "financial_wellness": ["{} planning", "Help with {}", "Advice on {}"],
-        "math_solver": ["Calculate {}", "Solve {}", "Math problem: {}"],
-        "ride_booking": ["Book Uber to {}", "Ride to {}", "Taxi from {} to {}"],
-        "calendar_management": ["Schedule meeting {}", "Add to calendar {}", "Calendar for {}"],
-        "complex_planning": ["Plan a trip to {}", "Help with {} and {}", "Comprehensive {}"]
-    }
-    
-    topics = ["Paris", "math", "wifi", "sleep", "budget", "family", "deals", "delivery", "algebra", "bus", "concert", "meeting", "sports", "everything"]
-    topic = random.choice(topics)
+def generate_query(intent, journey, rng=random):
+    topic = rng.choice(query_topics)
     
-    if intent in templates:
-        template = random.choice(templates[intent])
+    if intent in query_templates:
+        template = rng.choice(query_templates[intent])
         return template.format(topic, topic)
     else:
         return f"{intent.replace('_', ' ')} help"
 
-# Generate entry
-def generate_entry():
+# Formatting style for a simple QA answer
+def qa_formatting_style(intent):
+    return "single_word" if intent == "fact_lookup" else "greeting_response" if intent == "greeting" else "short_definition"
+
+# Generate entry (pass journey or qa to pin the entry to one agent or simple QA item)
+def generate_entry(rng=random, journey=None, qa=None):
     # 70% agent-specific, 30% simple QA
-    if random.random() < 0.7:
-        journey = random.choice(list(agents.keys()))
-        intent = random.choice(agents[journey])
+    if journey is None and qa is None:
+        if rng.random() < 0.7:
+            journey = rng.choice(agent_journeys)
+        else:
+            qa = rng.choice(simple_qa)
+    if journey is not None:
+        intent = rng.choice(agents[journey])
         primary_journey = journey
         journeys = [journey]
         direct_answer = None
         needs_execution = True
         execution_type = "cloud_agent"
-        complexity_score = random.randint(20, 80)
+        complexity_score = rng.randint(20, 80)
         formatting_style = "confirmation_summary"
     else:
-        intent, primary_journey, journeys, sample_answer = random.choice(simple_qa)
-        direct_answer = random.choice(direct_answers[intent])
+        intent, primary_journey, journeys, sample_answer = qa
+        direct_answer = rng.choice(direct_answers[intent])
         needs_execution = False
         execution_type = None
-        complexity_score = random.randint(1, 10)
-        formatting_style = "single_word" if intent == "fact_lookup" else "greeting_response" if intent == "greeting" else "short_definition"
+        complexity_score = rng.randint(1, 10)
+        formatting_style = qa_formatting_style(intent)
     
-    user_query = generate_query(intent, primary_journey)
+    user_query = generate_query(intent, primary_journey, rng)
     
     # Missing fields
     missing_fields = []
     needs_clarification = False
     clarification = None
-    if random.random() < 0.3 and not direct_answer:
-        possible_missing = ["date", "location", "guests", "budget", "details"]
-        missing_fields = random.sample(possible_missing, random.randint(1, 3))
+    if rng.random() < 0.3 and not direct_answer:
+        missing_fields = rng.sample(possible_missing, rng.randint(1, 3))
         needs_clarification = True
         clarification = f"Please provide: {', '.join(missing_fields)}"
         needs_execution = False
         execution_type = None
-        complexity_score = random.randint(15, 45)
+        complexity_score = rng.randint(15, 45)
         formatting_style = "clarification_prompt"
     
-    routing_confidence = round(random.uniform(0.7, 0.99), 2)
+    routing_confidence = round(rng.uniform(0.7, 0.99), 2)
     
     entry = {
         "messages": [
             {
                 "role": "system",
-                "content": "You are Arny's Tier-1 Router Model.\n\nYour job:\n- Decide what should happen next for a user query\n- Output STRICT JSON using the agreed schema\n- Answer directly ONLY if the answer is atomic\n- Never explain\n- Never chat\n- Ask clarification ONLY if required fields are missing"
+                "content": router_system_prompt
             },
             {
                 "role": "user",
@@ -131,12 +151,85 @@ def generate_entry():
     }
     return entry
 
-# Generate 3000 entries
-entries = [generate_entry() for _ in range(3000)]
+# Rows handled by one shard; the first `rows % shards` shards take one extra
+def shard_row_count(rows, shards, shard):
+    return rows // shards + (1 if shard < rows % shards else 0)
+
+# Each shard owns its own RNG so output does not depend on the worker count
+def shard_rng(seed, shard):
+    return random.Random(f"{seed}:{shard}")
+
+# Stream a shard's entries one at a time
+def iter_shard_entries(rows, shards, shard, seed):
+    rng = shard_rng(seed, shard)
+    for _ in range(shard_row_count(rows, shards, shard)):
+        yield generate_entry(rng)
 
-# Write to file
-with open("new_entries_fixed.jsonl", "w") as f:
-    for entry in entries:
-        f.write(json.dumps(entry) + "\n")
+def shard_path(output, shard, shards):
+    return f"{output}.shard-{shard:05d}-of-{shards:05d}"
+
+# Write one shard to its part file (runs inside a pool worker)
+def write_shard(job):
+    output, rows, shards, shard, seed = job
+    path = shard_path(output, shard, shards)
+    count = 0
+    with open(path, "w") as f:
+        for entry in iter_shard_entries(rows, shards, shard, seed):
+            f.write(json.dumps(entry) + "\n")
+            count += 1
+    return shard, count
+
+# Concatenate part files in shard order and remove them
+def merge_shards(output, shards):
+    with open(output, "w") as out:
+        for shard in range(shards):
+            path = shard_path(output, shard, shards)
+            with open(path) as part:
+                shutil.copyfileobj(part, out)
+            os.remove(path)
+
+# Write shards in parallel; each row is streamed straight to disk. Returns the row count.
+def write_shards(jobs, workers):
+    if workers == 1:
+        return sum(count for _, count in map(write_shard, jobs))
+    # The pool is terminated on exit, including when a worker raises
+    with Pool(workers) as pool:
+        return sum(count for _, count in pool.imap_unordered(write_shard, jobs))
+
+# Remove whatever part files a failed run left behind
+def remove_shards(output, shards):
+    for shard in range(shards):
+        path = shard_path(output, shard, shards)
+        if os.path.exists(path):
+            os.remove(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the Tier-1 router dataset")
+    parser.add_argument("--rows", type=int, default=3000, help="total number of entries")
+    parser.add_argument("--shards", type=int, default=1, help="number of independently seeded shards")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="base seed (random if omitted)")
+    parser.add_argument("--output", default="new_entries_fixed.jsonl", help="output JSONL path")
+    parser.add_argument("--keep-shards", action="store_true", help="leave per-shard part files instead of merging")
+    args = parser.parse_args()
+
+    if args.rows < 0 or args.shards < 1 or args.workers < 1:
+        parser.error("--rows must be >= 0, --shards and --workers must be >= 1")
+
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2**32)
+    jobs = [(args.output, args.rows, args.shards, shard, seed) for shard in range(args.shards)]
+
+    try:
+        total = write_shards(jobs, min(args.workers, args.shards))
+    except BaseException:
+        remove_shards(args.output, args.shards)
+        raise
+
+    if args.keep_shards:
+        print(f"Generated {total} entries in {args.shards} shard files next to {args.output} (seed {seed})")
+    else:
+        merge_shards(args.output, args.shards)
+        print(f"Generated {total} new entries with proper direct answers in {args.output} (seed {seed})")
 
-print("Generated 3000 new entries with proper direct answers in new_entries_fixed.jsonl")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import argparse
+import json
+import time
+from collections import Counter
+
+import numpy as np
+
+from generate_dataset_tier_1 import (
+    agent_journeys,
+    agents,
+    direct_answers,
+    generate_entry,
+    possible_missing,
+    qa_formatting_style,
+    query_templates,
+    query_topics,
+    router_system_prompt,
+    simple_qa,
+)
+
+# Lookup tables compiled once into integer-indexed arrays
+class RouterTables:
+    def __init__(self):
+        # Journeys and intents: agent journeys first, then the simple QA ones
+        self.journeys = list(agent_journeys)
+        self.intents = []
+        intent_ids = {}
+        for intent in [i for journey in agent_journeys for i in agents[journey]] + [qa[0] for qa in simple_qa]:
+            if intent not in intent_ids:
+                intent_ids[intent] = len(self.intents)
+                self.intents.append(intent)
+
+        # Agents: intent range per journey
+        self.journey_intent_offset = np.zeros(len(agent_journeys), dtype=np.int64)
+        self.journey_intent_count = np.zeros(len(agent_journeys), dtype=np.int64)
+        agent_intent_ids = []
+        for j, journey in enumerate(agent_journeys):
+            self.journey_intent_offset[j] = len(agent_intent_ids)
+            self.journey_intent_count[j] = len(agents[journey])
+            agent_intent_ids.extend(intent_ids[i] for i in agents[journey])
+        self.agent_intent_ids = np.array(agent_intent_ids, dtype=np.int64)
+
+        # Simple QA: intent, journey, style and answer range per entry
+        self.answers = []
+        self.styles = ["confirmation_summary", "clarification_prompt"]
+        self.qa_intent = np.zeros(len(simple_qa), dtype=np.int64)
+        self.qa_journey = np.zeros(len(simple_qa), dtype=np.int64)
+        self.qa_style = np.zeros(len(simple_qa), dtype=np.int64)
+        self.qa_answer_offset = np.zeros(len(simple_qa), dtype=np.int64)
+        self.qa_answer_count = np.zeros(len(simple_qa), dtype=np.int64)
+        self.journey_lists = {}
+        for q, (intent, journey, journeys, _) in enumerate(simple_qa):
+            if journey not in self.journeys:
+                self.journeys.append(journey)
+            self.journey_lists[intent] = journeys
+            style = qa_formatting_style(intent)
+            if style not in self.styles:
+                self.styles.append(style)
+            self.qa_intent[q] = intent_ids[intent]
+            self.qa_journey[q] = self.journeys.index(journey)
+            self.qa_style[q] = self.styles.index(style)
+            self.qa_answer_offset[q] = len(self.answers)
+            self.qa_answer_count[q] = len(direct_answers[intent])
+            self.answers.extend(direct_answers[intent])
+
+        # Queries: every template rendered with every topic, so one draw picks both
+        self.queries = []
+        self.intent_query_offset = np.zeros(len(self.intents), dtype=np.int64)
+        self.intent_query_count = np.zeros(len(self.intents), dtype=np.int64)
+        for i, intent in enumerate(self.intents):
+            self.intent_query_offset[i] = len(self.queries)
+            if intent in query_templates:
+                rendered = [t.format(topic, topic) for t in query_templates[intent] for topic in query_topics]
+            else:
+                rendered = [f"{intent.replace('_', ' ')} help"]
+            self.intent_query_count[i] = len(rendered)
+            self.queries.extend(rendered)
+
+        self.missing = list(possible_missing)
+
+        # JSON fragments escaped once, spliced together at write time
+        self.line_prefix = '{"messages": [{"role": "system", "content": ' + json.dumps(router_system_prompt) + '}, {"role": "user", "content": '
+        self.query_json = [json.dumps(q) for q in self.queries]
+        self.answer_json = [json.dumps(a) for a in self.answers]
+        self.style_json = [json.dumps(s) for s in self.styles]
+        self.decision_head = [
+            [
+                f'{{"intent": {json.dumps(intent)}, "primary_journey": {json.dumps(journey)}, "journeys": {json.dumps(self.journey_lists.get(intent, [journey]))}, "direct_answer": '
+                for journey in self.journeys
+            ]
+            for intent in self.intents
+        ]
+
+# Draw a batch of n routing decisions as parallel arrays
+def sample_batch(tables, n, rng):
+    # 70% agent-specific, 30% simple QA
+    is_agent = rng.random(n) < 0.7
+
+    agent_journey = rng.integers(0, len(tables.journey_intent_count), n)
+    agent_intent = tables.agent_intent_ids[
+        tables.journey_intent_offset[agent_journey] + rng.integers(0, tables.journey_intent_count[agent_journey])
+    ]
+    qa = rng.integers(0, len(tables.qa_intent), n)
+    answer = tables.qa_answer_offset[qa] + rng.integers(0, tables.qa_answer_count[qa])
+
+    intent = np.where(is_agent, agent_intent, tables.qa_intent[qa])
+    journey = np.where(is_agent, agent_journey, tables.qa_journey[qa])
+    answer = np.where(is_agent, -1, answer)
+    complexity = np.where(is_agent, rng.integers(20, 81, n), rng.integers(1, 11, n))
+    style = np.where(is_agent, 0, tables.qa_style[qa])
+
+    query = tables.intent_query_offset[intent] + rng.integers(0, tables.intent_query_count[intent])
+
+    # Missing fields: only for agent rows (QA rows always carry a direct answer)
+    missing = (rng.random(n) < 0.3) & is_agent
+    missing_count = np.where(missing, rng.integers(1, 4, n), 0)
+    # argsort of uniform keys is a uniform random permutation, like random.sample
+    missing_order = np.argsort(rng.random((n, len(tables.missing))), axis=1)
+    complexity = np.where(missing, rng.integers(15, 46, n), complexity)
+    style = np.where(missing, 1, style)
+
+    confidence = np.round(rng.uniform(0.7, 0.99, n), 2)
+
+    return {
+        "intent": intent,
+        "journey": journey,
+        "answer": answer,
+        "query": query,
+        "missing_count": missing_count,
+        "missing_order": missing_order,
+        "complexity": complexity,
+        "confidence": confidence,
+        "style": style,
+    }
+
+# Turn a sampled batch into JSONL lines, byte-identical to json.dumps(entry)
+# for the layout generate_entry builds
+def iter_batch_lines(tables, batch):
+    columns = {name: values.tolist() for name, values in batch.items()}
+    for i in range(len(columns["intent"])):
+        answer = columns["answer"][i]
+        count = columns["missing_count"][i]
+        if count:
+            missing_fields = [tables.missing[k] for k in columns["missing_order"][i][:count]]
+            middle = f'{json.dumps(missing_fields)}, "needs_clarification": true, "clarification": {json.dumps("Please provide: " + ", ".join(missing_fields))}, "needs_execution": false, "execution_type": null'
+        elif answer < 0:
+            middle = '[], "needs_clarification": false, "clarification": null, "needs_execution": true, "execution_type": "cloud_agent"'
+        else:
+            middle = '[], "needs_clarification": false, "clarification": null, "needs_execution": false, "execution_type": null'
+        content = (
+            tables.decision_head[columns["intent"][i]][columns["journey"][i]]
+            + (tables.answer_json[answer] if answer >= 0 else "null")
+            + ', "missing_fields": ' + middle
+            + f', "complexity_score": {columns["complexity"][i]}, "routing_confidence": {columns["confidence"][i]!r}, "formatting_style": {tables.style_json[columns["style"][i]]}}}'
+        )
+        yield tables.line_prefix + tables.query_json[columns["query"][i]] + '}, {"role": "assistant", "content": ' + json.dumps(content) + "}]}"
+
+# Stream `rows` JSONL lines, sampling batch_size decisions at a time
+def generate_lines(rows, seed=None, batch_size=65536, tables=None):
+    tables = tables or RouterTables()
+    rng = np.random.default_rng(seed)
+    remaining = rows
+    while remaining > 0:
+        n = min(batch_size, remaining)
+        yield from iter_batch_lines(tables, sample_batch(tables, n, rng))
+        remaining -= n
+
+# Marginal frequencies used to check the batch path against the scalar one
+def distribution_summary(entries):
+    counts = {"intent": Counter(), "primary_journey": Counter(), "formatting_style": Counter(), "missing_fields": Counter(), "query": Counter()}
+    complexity = confidence = 0
+    total = 0
+    for entry in entries:
+        decision = json.loads(entry["messages"][2]["content"])
+        for key in ("intent", "primary_journey", "formatting_style"):
+            counts[key][decision[key]] += 1
+        counts["missing_fields"][len(decision["missing_fields"])] += 1
+        counts["query"][entry["messages"][1]["content"]] += 1
+        complexity += decision["complexity_score"]
+        confidence += decision["routing_confidence"]
+        total += 1
+    return {
+        "frequencies": {key: {k: v / total for k, v in c.items()} for key, c in counts.items()},
+        "mean_complexity": complexity / total,
+        "mean_confidence": confidence / total,
+    }
+
+# Largest absolute gap between two frequency tables
+def max_frequency_gap(a, b):
+    return max(abs(a.get(k, 0.0) - b.get(k, 0.0)) for k in set(a) | set(b))
+
+def compare(rows, seed, batch_size):
+    import random
+
+    # Both paths are timed up to finished JSONL lines
+    scalar_rng = random.Random(seed)
+    start = time.perf_counter()
+    scalar = [json.dumps(generate_entry(scalar_rng)) for _ in range(rows)]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = list(generate_lines(rows, seed, batch_size))
+    batch_time = time.perf_counter() - start
+
+    print(f"scalar: {rows / scalar_time:,.0f} rows/sec")
+    print(f"batch:  {rows / batch_time:,.0f} rows/sec ({scalar_time / batch_time:.1f}x)")
+
+    a = distribution_summary(json.loads(line) for line in scalar)
+    b = distribution_summary(json.loads(line) for line in batch)
+    for key in a["frequencies"]:
+        print(f"max {key} frequency gap: {max_frequency_gap(a['frequencies'][key], b['frequencies'][key]):.4f}")
+    print(f"mean complexity_score: {a['mean_complexity']:.2f} vs {b['mean_complexity']:.2f}")
+    print(f"mean routing_confidence: {a['mean_confidence']:.4f} vs {b['mean_confidence']:.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the Tier-1 router dataset with the NumPy batch engine")
+    parser.add_argument("--rows", type=int, default=3000, help="total number of entries")
+    parser.add_argument("--batch-size", type=int, default=65536, help="decisions sampled per batch")
+    parser.add_argument("--seed", type=int, default=None, help="NumPy seed (random if omitted)")
+    parser.add_argument("--output", default="new_entries_fixed.jsonl", help="output JSONL path")
+    parser.add_argument("--compare", action="store_true", help="compare throughput and distribution against the scalar path instead of writing")
+    args = parser.parse_args()
+
+    if args.rows < 1 or args.batch_size < 1:
+        parser.error("--rows and --batch-size must be >= 1")
+
+    if args.compare:
+        compare(args.rows, args.seed, args.batch_size)
+        return
+
+    with open(args.output, "w") as f:
+        for line in generate_lines(args.rows, args.seed, args.batch_size):
+            f.write(line + "\n")
+
+    print(f"Generated {args.rows} new entries with proper direct answers in {args.output}")
+
+if __name__ == "__main__":
+    main()
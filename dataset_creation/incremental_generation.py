@@ -0,0 +1,161 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import random
+import re
+import shutil
+from collections import namedtuple
+
+import generate_dataset_reasoning_tier_2 as tier2
+import generate_dataset_tier_1 as tier1
+
+# A generation unit: a named slice of the output whose rows depend only on `payload`
+# (the source tables it reads) plus the row count and seed.
+Unit = namedtuple("Unit", ["name", "rows", "payload", "generate"])
+
+MANIFEST_NAME = "manifest.json"
+
+def _source_digest(*functions):
+    return hashlib.sha256("".join(inspect.getsource(f) for f in functions).encode("utf-8")).hexdigest()
+
+def fingerprint(unit, seed):
+    data = json.dumps({"name": unit.name, "rows": unit.rows, "seed": seed, "payload": unit.payload}, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+# Default rows per unit, sized so the current tables give about the 3000 rows
+# (and Tier-1's 70/30 agent/QA split) of the original scripts. Each unit's count
+# is fixed, so adding or removing a table entry never changes another unit.
+TIER1_AGENT_ROWS = 131
+TIER1_QA_ROWS = 225
+TIER2_CELL_ROWS = 11
+
+# Tier-1: one unit per agent (its intent set) and one per simple QA item
+def tier1_units(agent_rows=TIER1_AGENT_ROWS, qa_rows=TIER1_QA_ROWS):
+    code = _source_digest(tier1.generate_entry, tier1.generate_query, tier1.qa_formatting_style)
+    shared = {
+        "code": code,
+        "topics": tier1.query_topics,
+        "missing": tier1.possible_missing,
+        "system": tier1.router_system_prompt,
+    }
+    units = []
+    for journey in tier1.agent_journeys:
+        intents = tier1.agents[journey]
+        payload = dict(shared, journey=journey, intents=intents, templates={i: tier1.query_templates.get(i) for i in intents})
+        units.append(Unit(f"agent-{journey}", agent_rows, payload,
+                          lambda rng, n, journey=journey: (tier1.generate_entry(rng, journey=journey) for _ in range(n))))
+    for qa in tier1.simple_qa:
+        intent = qa[0]
+        payload = dict(shared, qa=qa, answers=tier1.direct_answers[intent], templates={intent: tier1.query_templates.get(intent)})
+        units.append(Unit(f"qa-{intent}", qa_rows, payload,
+                          lambda rng, n, qa=qa: (tier1.generate_entry(rng, qa=qa) for _ in range(n))))
+    return units
+
+# Tier-2: one unit per topic x question_type cell
+def tier2_units(cell_rows=TIER2_CELL_ROWS):
+    code = _source_digest(tier2.build_tier2_entry)
+    units = []
+    for topic in tier2.topics_explanations:
+        for question_type in tier2.reasoning_templates:
+            payload = {
+                "code": code,
+                "explanation": tier2.topics_explanations[topic],
+                "template": tier2.reasoning_templates[question_type],
+                "response": tier2.generate_reasoning_response(topic, question_type),
+            }
+            units.append(Unit(f"cell-{topic}-{question_type}", cell_rows, payload,
+                              lambda rng, n, topic=topic, question_type=question_type: (tier2.build_tier2_entry(topic, question_type) for _ in range(n))))
+    return units
+
+def _write_json_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+def _segment_file(unit, digest):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", unit.name) + f".{digest}.jsonl"
+
+# Files this tool writes into the segments directory: segments (and their
+# .partial files while being written) and the manifest's temporary file
+_OWN_FILE = re.compile(r"[A-Za-z0-9_.-]+\.[0-9a-f]{16}\.jsonl(\.partial)?|" + re.escape(MANIFEST_NAME) + r"\.tmp")
+
+# Regenerate changed units into segment files, then stitch them into `output`.
+# The manifest is updated after every finished segment, so an interrupted run
+# resumes from the last completed one.
+def run(units, output, seed, segments_dir=None):
+    segments_dir = segments_dir or output + ".segments"
+    os.makedirs(segments_dir, exist_ok=True)
+    manifest_path = os.path.join(segments_dir, MANIFEST_NAME)
+    manifest = {"units": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    regenerated = reused = 0
+    for unit in units:
+        digest = fingerprint(unit, seed)
+        entry = manifest["units"].get(unit.name)
+        if entry and entry["fingerprint"] == digest and os.path.exists(os.path.join(segments_dir, entry["file"])):
+            reused += 1
+            continue
+
+        name = _segment_file(unit, digest)
+        path = os.path.join(segments_dir, name)
+        rng = random.Random(f"{seed}:{unit.name}")
+        with open(path + ".partial", "w") as f:
+            for row in unit.generate(rng, unit.rows):
+                f.write(json.dumps(row) + "\n")
+        os.replace(path + ".partial", path)
+
+        manifest["units"][unit.name] = {"fingerprint": digest, "rows": unit.rows, "file": name}
+        _write_json_atomic(manifest_path, manifest)
+        regenerated += 1
+
+    # Forget units that no longer exist and delete segments nothing refers to.
+    # Anything in the directory that this tool did not write is left alone.
+    names = {unit.name for unit in units}
+    manifest["units"] = {name: entry for name, entry in manifest["units"].items() if name in names}
+    _write_json_atomic(manifest_path, manifest)
+    live = {entry["file"] for entry in manifest["units"].values()}
+    for name in os.listdir(segments_dir):
+        if name not in live and _OWN_FILE.fullmatch(name):
+            os.remove(os.path.join(segments_dir, name))
+
+    # Merge in unit order
+    with open(output + ".tmp", "w") as out:
+        for unit in units:
+            with open(os.path.join(segments_dir, manifest["units"][unit.name]["file"])) as segment:
+                shutil.copyfileobj(segment, out)
+    os.replace(output + ".tmp", output)
+
+    return regenerated, reused
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally (re)generate a dataset from content-addressed segments")
+    parser.add_argument("tier", choices=["tier1", "tier2"], help="which generator to run")
+    parser.add_argument("--rows-per-unit", type=int, default=None,
+                        help=f"rows per Tier-1 agent unit or Tier-2 cell (default {TIER1_AGENT_ROWS} / {TIER2_CELL_ROWS})")
+    parser.add_argument("--qa-rows-per-unit", type=int, default=TIER1_QA_ROWS, help="rows per Tier-1 simple QA unit")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; each unit derives its own RNG from it")
+    parser.add_argument("--output", default=None, help="output JSONL path (defaults to the generator's usual file name)")
+    parser.add_argument("--segments", default=None, help="segment directory (defaults to <output>.segments)")
+    args = parser.parse_args()
+
+    if (args.rows_per_unit is not None and args.rows_per_unit < 0) or args.qa_rows_per_unit < 0:
+        parser.error("--rows-per-unit and --qa-rows-per-unit must be >= 0")
+
+    if args.tier == "tier1":
+        units = tier1_units(TIER1_AGENT_ROWS if args.rows_per_unit is None else args.rows_per_unit, args.qa_rows_per_unit)
+        output = args.output or "new_entries_fixed.jsonl"
+    else:
+        units = tier2_units(TIER2_CELL_ROWS if args.rows_per_unit is None else args.rows_per_unit)
+        output = args.output or "tier2_reasoning_dataset_3k.jsonl"
+
+    regenerated, reused = run(units, output, args.seed, args.segments)
+    print(f"Regenerated {regenerated} of {len(units)} units, reused {reused}; wrote {sum(unit.rows for unit in units)} entries to {output}")
+
+if __name__ == "__main__":
+    main()
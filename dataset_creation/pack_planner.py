@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from tokenized_dataset import TokenizedDataset, get_tokenizer, render_message
+
+# Persistent length cache: content hash -> token length, one file per tokenizer
+class LengthCache:
+    def __init__(self, path):
+        self.path = path
+        self.lengths = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            count = len(data) // 12
+            keys = array("Q", data[:count * 8])
+            lengths = array("I", data[count * 8:count * 12])
+            self.lengths = dict(zip(keys, lengths))
+
+    def get(self, key):
+        return self.lengths.get(key)
+
+    def put(self, key, length):
+        self.lengths[key] = length
+        self.dirty = True
+
+    # Rewrites the whole cache; it holds one entry per distinct sample, so it stays small
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        keys = array("Q", self.lengths.keys())
+        lengths = array("I", self.lengths.values())
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(keys.tobytes())
+            f.write(lengths.tobytes())
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+def default_cache_path(input_path, tokenizer_name):
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", tokenizer_name)
+    return os.path.join(os.path.dirname(os.path.abspath(input_path)), f".pack_lengths.{safe_name}.cache")
+
+# Token length of every sample in a messages JSONL file, in file order
+def jsonl_lengths(input_path, tokenizer, cache):
+    lengths = array("I")
+    hits = 0
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                messages = json.loads(line)["messages"]
+            except (ValueError, KeyError) as exc:
+                raise ValueError(f"{input_path}:{line_number}: not a messages row ({exc})") from None
+            text = "".join(render_message(m) for m in messages)
+            key = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            length = cache.get(key)
+            if length is None:
+                length = len(tokenizer.encode(text))
+                cache.put(key, length)
+            else:
+                hits += 1
+            lengths.append(length)
+    return lengths, hits
+
+# Token length of every sample in a pre-tokenized dataset (read from its offset index)
+def tokenized_lengths(prefix):
+    with TokenizedDataset(prefix) as dataset:
+        return array("I", (dataset.sample_length(i) for i in range(len(dataset)))), dataset.meta["tokenizer"]
+
+# Best-fit decreasing: each sample goes into the fullest open bin that still has room.
+# Open bins are bucketed by remaining capacity, so a lookup is a bisect over at most
+# max_len + 1 distinct capacities rather than a scan over all bins.
+def pack(lengths, max_len):
+    order = sorted(range(len(lengths)), key=lengths.__getitem__, reverse=True)
+    bins = []
+    bin_tokens = []
+    by_capacity = {}
+    capacities = []
+    oversize = []
+
+    for i in order:
+        length = lengths[i]
+        if length >= max_len:
+            # Too long to share a bin; the trainer truncates it to max_len
+            if length > max_len:
+                oversize.append(i)
+            bins.append([i])
+            bin_tokens.append(max_len)
+            continue
+
+        pos = bisect_left(capacities, length)
+        if pos < len(capacities):
+            capacity = capacities[pos]
+            stack = by_capacity[capacity]
+            b = stack.pop()
+            if not stack:
+                del by_capacity[capacity]
+                capacities.pop(pos)
+        else:
+            capacity = max_len
+            b = len(bins)
+            bins.append([])
+            bin_tokens.append(0)
+
+        bins[b].append(i)
+        bin_tokens[b] += length
+        remaining = capacity - length
+        if remaining:
+            if remaining not in by_capacity:
+                by_capacity[remaining] = []
+                insort(capacities, remaining)
+            by_capacity[remaining].append(b)
+
+    return bins, bin_tokens, oversize
+
+# Bins used by greedy packing in file order, for comparison
+def sequential_bin_count(lengths, max_len):
+    count, used = 0, max_len
+    for length in lengths:
+        length = min(length, max_len)
+        if used + length > max_len:
+            count += 1
+            used = 0
+        used += length
+    return count
+
+def plan(input_path, output_path, max_len=2048, tokenizer_spec="byte", cache_path=None):
+    start = time.perf_counter()
+    cache_hits = None
+    if os.path.exists(input_path + ".json") and os.path.exists(input_path + ".idx"):
+        lengths, tokenizer_name = tokenized_lengths(input_path)
+    else:
+        tokenizer = get_tokenizer(tokenizer_spec)
+        tokenizer_name = tokenizer.name
+        cache = LengthCache(cache_path or default_cache_path(input_path, tokenizer_name))
+        lengths, cache_hits = jsonl_lengths(input_path, tokenizer, cache)
+        cache.save()
+    measured = time.perf_counter()
+
+    bins, bin_tokens, oversize = pack(lengths, max_len)
+    packed = time.perf_counter()
+
+    total_tokens = sum(min(length, max_len) for length in lengths)
+    sequential_bins = sequential_bin_count(lengths, max_len)
+    manifest = {
+        "source": input_path,
+        "tokenizer": tokenizer_name,
+        "max_seq_length": max_len,
+        "num_samples": len(lengths),
+        "num_bins": len(bins),
+        "num_tokens": total_tokens,
+        "efficiency": total_tokens / (len(bins) * max_len) if bins else 0.0,
+        "sequential_efficiency": total_tokens / (sequential_bins * max_len) if sequential_bins else 0.0,
+        "oversize_samples": sorted(oversize),
+        "bins": [{"samples": samples, "tokens": tokens} for samples, tokens in zip(bins, bin_tokens)],
+    }
+    with open(output_path, "w") as f:
+        json.dump(manifest, f)
+
+    stats = {
+        "length_seconds": measured - start,
+        "pack_seconds": packed - measured,
+        "cache_hits": cache_hits,
+    }
+    return manifest, stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan sequence packing for a messages JSONL file or a pre-tokenized dataset")
+    parser.add_argument("input", help="messages JSONL path, or a tokenized_dataset.py prefix")
+    parser.add_argument("output", help="pack manifest JSON path")
+    parser.add_argument("--max-seq-length", type=int, default=2048, help="tokens per packed sequence")
+    parser.add_argument("--tokenizer", default="byte", help="'byte' (default) or 'hf:<model name>'; ignored for pre-tokenized input")
+    parser.add_argument("--cache", default=None, help="length cache path (defaults to a per-tokenizer file next to the input)")
+    args = parser.parse_args()
+
+    if args.max_seq_length < 1:
+        parser.error("--max-seq-length must be >= 1")
+
+    manifest, stats = plan(args.input, args.output, args.max_seq_length, args.tokenizer, args.cache)
+
+    print(f"Samples: {manifest['num_samples']} ({manifest['num_tokens']} tokens, tokenizer {manifest['tokenizer']})")
+    if stats["cache_hits"] is not None:
+        print(f"Length cache hits: {stats['cache_hits']}")
+    print(f"Bins of {manifest['max_seq_length']} tokens: {manifest['num_bins']}")
+    print(f"Packing efficiency: {manifest['efficiency']:.2%} (sequential packing: {manifest['sequential_efficiency']:.2%})")
+    if manifest["oversize_samples"]:
+        print(f"Samples longer than {manifest['max_seq_length']} tokens (truncated, one per bin): {len(manifest['oversize_samples'])}")
+    print(f"Lengths in {stats['length_seconds']:.2f}s, packing in {stats['pack_seconds']:.2f}s, manifest written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import argparse
+import heapq
+import json
+import random
+
+from generate_dataset_tier_1 import generate_entry
+
+# Model footprints: Q4_K_M file plus KV cache/context buffers (Tier-1 nCtx 512, Tier-2 nCtx 2048)
+MODELS = {
+    "tier1": {"file_mb": 941, "context_mb": 56},
+    "tier2": {"file_mb": 1800, "context_mb": 224},
+}
+
+# Device classes from the RAM budget table in device_run_mobile.md. app_ram_mb is the
+# budget for the app; storage read speed and decode speeds are rough estimates.
+DEVICE_CLASSES = {
+    "low_end": {"app_ram_mb": 1536, "load_mb_per_s": 250, "tokens_per_s": {"tier1": 15, "tier2": 7}},
+    "mid_range": {"app_ram_mb": 3072, "load_mb_per_s": 500, "tokens_per_s": {"tier1": 25, "tier2": 12}},
+    "high_end": {"app_ram_mb": 5120, "load_mb_per_s": 1000, "tokens_per_s": {"tier1": 40, "tier2": 20}},
+}
+
+# Per-request token counts and timing assumptions
+ROUTER_PROMPT_TOKENS = 120
+ROUTER_OUTPUT_TOKENS = 110
+REASONER_PROMPT_TOKENS = 80
+REASONER_OUTPUT_TOKENS = 300
+PREFILL_SPEEDUP = 4        # prompt tokens are processed this many times faster than decoded ones
+LOAD_OVERHEAD_S = 0.3      # fixed model init cost on top of reading the file
+
+def footprint(model):
+    return MODELS[model]["file_mb"] + MODELS[model]["context_mb"]
+
+# Unload Tier-2 as soon as the request finishes (the current orchestrator)
+class UnloadImmediately:
+    name = "unload_immediately"
+
+    def on_arrival(self, sim, request):
+        pass
+
+    def after_request(self, sim, request, used_tier2):
+        if used_tier2:
+            sim.unload("tier2")
+
+# Keep Tier-2 until it has been idle for ttl seconds
+class IdleTTL:
+    def __init__(self, ttl=120.0):
+        self.ttl = ttl
+        self.name = f"idle_ttl_{ttl:g}s"
+
+    def on_arrival(self, sim, request):
+        pass
+
+    def after_request(self, sim, request, used_tier2):
+        if used_tier2:
+            sim.unload_if_idle("tier2", self.ttl)
+
+# Never unload voluntarily; models are evicted least-recently-used first when a load
+# would exceed the memory cap (the device budget unless a lower cap is given)
+class LRUUnderCap:
+    def __init__(self, cap_mb=None):
+        self.cap_mb = cap_mb
+        self.name = f"lru_cap_{cap_mb}mb" if cap_mb else "lru_cap"
+
+    def on_arrival(self, sim, request):
+        pass
+
+    def after_request(self, sim, request, used_tier2):
+        pass
+
+# Track an exponentially weighted rate of complex requests. While it is high, start
+# loading Tier-2 as soon as a request arrives (overlapping queueing and Tier-1 routing)
+# and keep it resident with an idle TTL; otherwise behave like UnloadImmediately.
+class PredictivePreload:
+    def __init__(self, alpha=0.3, preload_at=0.3, ttl=120.0):
+        self.alpha = alpha
+        self.preload_at = preload_at
+        self.ttl = ttl
+        self.rate = 0.0
+        self.name = f"predictive_preload_{preload_at:g}"
+
+    def on_arrival(self, sim, request):
+        if self.rate >= self.preload_at:
+            sim.preload("tier2", request["arrival"])
+
+    def after_request(self, sim, request, used_tier2):
+        self.rate = (1 - self.alpha) * self.rate + self.alpha * used_tier2
+        if self.rate >= self.preload_at:
+            sim.unload_if_idle("tier2", self.ttl)
+        else:
+            sim.unload("tier2")
+
+def make_policies(ttl, cap_mb):
+    policies = [lambda: UnloadImmediately(), lambda: IdleTTL(ttl), lambda: LRUUnderCap(), lambda: PredictivePreload(ttl=ttl)]
+    if cap_mb:
+        policies.append(lambda: LRUUnderCap(cap_mb))
+    return policies
+
+# Single inference engine serving requests in arrival order. Model loads are I/O and
+# may overlap computation (preloads); memory is charged from the moment a load starts.
+class Simulator:
+    def __init__(self, device, policy, threshold=60):
+        self.device = DEVICE_CLASSES[device]
+        self.policy = policy
+        self.threshold = threshold
+        self.budget = min(self.device["app_ram_mb"], getattr(policy, "cap_mb", None) or self.device["app_ram_mb"])
+        self.now = 0.0
+        self.ready_at = {"tier1": 0.0}    # resident (or loading) model -> time it is usable
+        self.last_used = {"tier1": 0.0}
+        self.timers = []
+        self.timer_count = 0
+        self.peak_mb = self.used_mb()
+        self.loads = 0
+        self.wasted_preloads = 0
+        self.load_seconds = 0.0
+        self._unused_preload = set()
+
+    def used_mb(self):
+        return sum(footprint(model) for model in self.ready_at)
+
+    def load_time(self, model):
+        return MODELS[model]["file_mb"] / self.device["load_mb_per_s"] + LOAD_OVERHEAD_S
+
+    def fits(self, model):
+        return footprint(model) <= self.budget
+
+    # Evict least-recently-used models until `model` fits
+    def _make_room(self, model):
+        while self.used_mb() + footprint(model) > self.budget:
+            candidates = [m for m in self.ready_at if m != model]
+            if not candidates:
+                return False
+            self.unload(min(candidates, key=self.last_used.get))
+        return True
+
+    def _start_load(self, model, at):
+        self.ready_at[model] = at + self.load_time(model)
+        self.last_used[model] = at
+        self.loads += 1
+        self.load_seconds += self.load_time(model)
+        self.peak_mb = max(self.peak_mb, self.used_mb())
+
+    # Block until `model` is usable, loading it if needed; returns the time it is ready
+    def ensure(self, model, at):
+        if model in self.ready_at:
+            self._unused_preload.discard(model)
+            return max(at, self.ready_at[model])
+        self._make_room(model)
+        self._start_load(model, at)
+        return self.ready_at[model]
+
+    def preload(self, model, at):
+        at = max(at, self.now)
+        if model in self.ready_at or not self.fits(model):
+            return
+        # Only preload into free memory; never evict for a guess
+        if self.used_mb() + footprint(model) > self.budget:
+            return
+        self._start_load(model, at)
+        self._unused_preload.add(model)
+
+    def unload(self, model):
+        if model not in self.ready_at:
+            return
+        del self.ready_at[model]
+        if model in self._unused_preload:
+            self._unused_preload.discard(model)
+            self.wasted_preloads += 1
+
+    def unload_if_idle(self, model, ttl):
+        self.timer_count += 1
+        heapq.heappush(self.timers, (self.now + ttl, self.timer_count, model, self.now))
+
+    def _fire_timers(self, until):
+        while self.timers and self.timers[0][0] <= until:
+            when, _, model, scheduled_at = heapq.heappop(self.timers)
+            self.now = max(self.now, when)
+            if model in self.ready_at and self.last_used.get(model, 0.0) <= scheduled_at:
+                self.unload(model)
+
+    def serve(self, request):
+        tps = self.device["tokens_per_s"]
+        arrival = request["arrival"]
+        self._fire_timers(arrival)
+        self.policy.on_arrival(self, request)
+        start = max(arrival, self.now)
+        self._fire_timers(start)
+
+        t = self.ensure("tier1", start)
+        t += ROUTER_PROMPT_TOKENS / (tps["tier1"] * PREFILL_SPEEDUP) + ROUTER_OUTPUT_TOKENS / tps["tier1"]
+        self.last_used["tier1"] = t
+
+        complex_request = request["complexity_score"] > self.threshold
+        used_tier2 = False
+        degraded = False
+        if complex_request and self.fits("tier2"):
+            t = self.ensure("tier2", t)
+            t += REASONER_PROMPT_TOKENS / (tps["tier2"] * PREFILL_SPEEDUP) + REASONER_OUTPUT_TOKENS / tps["tier2"]
+            self.last_used["tier2"] = t
+            used_tier2 = True
+        elif complex_request:
+            # Tier-2 can never fit: answer with Tier-1 instead
+            t += REASONER_OUTPUT_TOKENS / tps["tier1"]
+            degraded = True
+
+        self.now = t
+        self.policy.after_request(self, request, used_tier2)
+        return {"latency": t - arrival, "complex": complex_request, "degraded": degraded}
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def simulate(trace, device, policy, threshold=60):
+    sim = Simulator(device, policy, threshold)
+    results = [sim.serve(request) for request in trace]
+    latencies = sorted(r["latency"] for r in results)
+    complex_latencies = sorted(r["latency"] for r in results if r["complex"])
+    return {
+        "device": device,
+        "policy": policy.name,
+        "requests": len(results),
+        "complex_requests": len(complex_latencies),
+        "p50_s": _percentile(latencies, 0.5),
+        "p95_s": _percentile(latencies, 0.95),
+        "complex_p50_s": _percentile(complex_latencies, 0.5),
+        "complex_p95_s": _percentile(complex_latencies, 0.95),
+        "peak_ram_mb": sim.peak_mb,
+        "model_loads": sim.loads,
+        "load_seconds": sim.load_seconds,
+        "wasted_preloads": sim.wasted_preloads,
+        "degraded": sum(r["degraded"] for r in results),
+    }
+
+# Synthetic trace: Poisson arrivals, complexity scores from the Tier-1 generator
+def synthetic_trace(count, mean_gap, seed):
+    rng = random.Random(seed)
+    t = 0.0
+    trace = []
+    for _ in range(count):
+        t += rng.expovariate(1 / mean_gap)
+        decision = json.loads(generate_entry(rng)["messages"][2]["content"])
+        trace.append({"arrival": t, "complexity_score": decision["complexity_score"]})
+    return trace
+
+# Trace file: JSONL with "arrival" and "complexity_score", or router messages rows
+# (arrivals then come from mean_gap)
+def read_trace(path, mean_gap, seed):
+    rng = random.Random(seed)
+    t = 0.0
+    trace = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if "messages" in row:
+                t += rng.expovariate(1 / mean_gap)
+                content = next(m["content"] for m in row["messages"] if m["role"] == "assistant")
+                trace.append({"arrival": t, "complexity_score": json.loads(content)["complexity_score"]})
+            else:
+                trace.append({"arrival": float(row["arrival"]), "complexity_score": int(row["complexity_score"])})
+    trace.sort(key=lambda r: r["arrival"])
+    return trace
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Tier-1/Tier-2 residency policies under device RAM budgets")
+    parser.add_argument("--trace", help="trace JSONL (arrival + complexity_score, or router messages rows)")
+    parser.add_argument("--requests", type=int, default=5000, help="synthetic trace length")
+    parser.add_argument("--mean-gap", type=float, default=60.0, help="mean seconds between requests")
+    parser.add_argument("--seed", type=int, default=0, help="trace seed")
+    parser.add_argument("--threshold", type=int, default=60, help="complexity_score above which Tier-2 is used")
+    parser.add_argument("--ttl", type=float, default=120.0, help="idle TTL for the TTL and predictive policies")
+    parser.add_argument("--cap-mb", type=int, default=None, help="also run LRU under this memory cap")
+    parser.add_argument("--devices", nargs="+", default=list(DEVICE_CLASSES), choices=list(DEVICE_CLASSES))
+    parser.add_argument("--json", help="write all results to this path")
+    args = parser.parse_args()
+
+    trace = read_trace(args.trace, args.mean_gap, args.seed) if args.trace else synthetic_trace(args.requests, args.mean_gap, args.seed)
+    complex_share = sum(r["complexity_score"] > args.threshold for r in trace) / len(trace) if trace else 0.0
+    print(f"Trace: {len(trace)} requests, {complex_share:.1%} above complexity {args.threshold}")
+
+    results = []
+    header = f"{'device':10s} {'policy':24s} {'p50':>7s} {'p95':>7s} {'cx p50':>7s} {'cx p95':>7s} {'peak MB':>8s} {'loads':>6s} {'wasted':>6s} {'degraded':>8s}"
+    print(header)
+    for device in args.devices:
+        for make_policy in make_policies(args.ttl, args.cap_mb):
+            r = simulate(trace, device, make_policy(), args.threshold)
+            results.append(r)
+            print(f"{r['device']:10s} {r['policy']:24s} {r['p50_s']:6.2f}s {r['p95_s']:6.2f}s {r['complex_p50_s']:6.2f}s "
+                  f"{r['complex_p95_s']:6.2f}s {r['peak_ram_mb']:8d} {r['model_loads']:6d} {r['wasted_preloads']:6d} {r['degraded']:8d}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+import argparse
+import json
+import random
+import re
+import time
+from collections import Counter, OrderedDict
+
+from generate_dataset_reasoning_tier_2 import reasoning_templates, topics_explanations
+from generate_dataset_tier_1 import agents, direct_answers, generate_entry, query_templates, query_topics
+from router_stream_validator import validate
+
+_WORD = re.compile(r"\w+")
+# Cache-key tokens: numbers (with their decimal point or separators), words and
+# the operators that change a query's meaning, so "2+2" and "2-2" stay distinct
+_KEY_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|\w+|[-+*/=%^()]")
+_SLOT = object()
+
+# Fixed scores for fast-path decisions: agents get the middle of the generator's
+# 20-80 complexity range, greetings its 1-10 QA range
+AGENT_COMPLEXITY = 50
+GREETING_COMPLEXITY = 5
+EXACT_CONFIDENCE = 0.95
+TEMPLATE_CONFIDENCE = 0.9
+
+# Argument name for a slot, from the literal word in front of it
+_SLOT_NAMES = {"from": "from", "to": "to", "in": "location"}
+
+# Open slots take any phrase up to this many words
+MAX_SLOT_WORDS = 3
+
+def normalize(query):
+    return " ".join(_KEY_TOKEN.findall(query.lower()))
+
+# Template text -> list of lowercase literal tokens and _SLOT markers
+def compile_template(template):
+    pattern = []
+    for i, part in enumerate(template.split("{}")):
+        if i:
+            pattern.append(_SLOT)
+        pattern.extend(_WORD.findall(part.lower()))
+    return pattern
+
+# Slots after a place word, and all slots of templates with two or more literal
+# words, are open. The rest ("YouTube {}", "{} tips") only take a known topic,
+# since a single literal is too weak an anchor ("YouTube is down again").
+def slot_modes(pattern):
+    literals = sum(token is not _SLOT for token in pattern)
+    return ["open" if literals >= 2 or (i and pattern[i - 1] in _SLOT_NAMES) else "topic"
+            for i, token in enumerate(pattern) if token is _SLOT]
+
+def slot_names(pattern):
+    names = []
+    for i, token in enumerate(pattern):
+        if token is _SLOT:
+            name = _SLOT_NAMES.get(pattern[i - 1], "topic") if i else "topic"
+            names.append(name if name not in names else f"{name}_{len(names) + 1}")
+    return names
+
+def agent_decision(intent, journey, arguments, confidence):
+    return {
+        "intent": intent,
+        "primary_journey": journey,
+        "journeys": [journey],
+        "needs_tools": True,
+        # No canonical tool ID is known for generator intents; the orchestrator resolves it
+        "tool": None,
+        "arguments": arguments,
+        "missing_fields": [],
+        "needs_clarification": False,
+        "clarification": None,
+        "complexity_score": AGENT_COMPLEXITY,
+        "routing_confidence": confidence,
+        "formatting_style": "confirmation_summary",
+        "response_template": None,
+    }
+
+def greeting_decision(answer):
+    return {
+        "intent": "greeting",
+        "primary_journey": "general_qa",
+        "journeys": ["general_qa"],
+        "needs_tools": False,
+        "tool": None,
+        "arguments": {},
+        "direct_answer": answer,
+        "missing_fields": [],
+        "needs_clarification": False,
+        "clarification": None,
+        "complexity_score": GREETING_COMPLEXITY,
+        "routing_confidence": EXACT_CONFIDENCE,
+        "formatting_style": "greeting_response",
+        "response_template": None,
+    }
+
+def _trie_node():
+    return {"children": {}, "slots": {}, "targets": []}
+
+# Token trie over the generator's query shapes. Literal edges match one word;
+# open slot edges match 1..MAX_SLOT_WORDS words, topic slot edges one phrase
+# from the topic vocabulary.
+class QueryIndex:
+    def __init__(self, topics):
+        self.root = _trie_node()
+        self.size = 0
+        self.topics = {tuple(_WORD.findall(value.lower())) for value in topics}
+        self.topics.discard(())
+        self.max_topic_words = max(map(len, self.topics), default=0)
+
+    def add(self, pattern, build):
+        node = self.root
+        modes = iter(slot_modes(pattern))
+        for token in pattern:
+            if token is _SLOT:
+                node = node["slots"].setdefault(next(modes), _trie_node())
+            else:
+                node = node["children"].setdefault(token, _trie_node())
+        literals = sum(token is not _SLOT for token in pattern)
+        node["targets"].append((literals, slot_names(pattern), build))
+        self.size += 1
+
+    # Most specific matching shape as (build, slot names, slot word spans), or
+    # None (no match, or a tie between different shapes)
+    def match(self, query):
+        tokens = [t.lower() for t in _WORD.findall(query)]
+        matches = []
+
+        def walk(node, i, spans):
+            if i == len(tokens):
+                for literals, names, build in node["targets"]:
+                    matches.append((literals, names, build, spans))
+                return
+            child = node["children"].get(tokens[i])
+            if child is not None:
+                walk(child, i + 1, spans)
+            if "open" in node["slots"]:
+                for j in range(i + 1, min(len(tokens), i + MAX_SLOT_WORDS) + 1):
+                    walk(node["slots"]["open"], j, spans + [(i, j)])
+            if "topic" in node["slots"]:
+                for j in range(i + 1, min(len(tokens), i + self.max_topic_words) + 1):
+                    if tuple(tokens[i:j]) in self.topics:
+                        walk(node["slots"]["topic"], j, spans + [(i, j)])
+
+        walk(self.root, 0, [])
+        if not matches:
+            return None
+        best = max(m[0] for m in matches)
+        top = [m for m in matches if m[0] == best]
+        if len({id(m[2]) for m in top}) > 1:
+            return None
+        _, names, build, spans = top[0]
+        return build, names, spans
+
+    def lookup(self, query):
+        found = self.match(query)
+        if found is None:
+            return None
+        build, names, spans = found
+        return build(slot_arguments(query, names, spans))
+
+# Slot values of `query` for the given word spans, in the query's own casing
+def slot_arguments(query, names, spans):
+    raw = _WORD.findall(query)
+    return {name: " ".join(raw[i:j]) for name, (i, j) in zip(names, spans)}
+
+# Index built from the Tier-1 generator tables; topic slots accept the generator's topics
+def build_index(topics=query_topics):
+    index = QueryIndex(topics)
+    intent_journey = {intent: journey for journey, intents in agents.items() for intent in intents}
+
+    for intent, journey in intent_journey.items():
+        if intent in query_templates:
+            for template in query_templates[intent]:
+                index.add(compile_template(template),
+                          lambda args, intent=intent, journey=journey: agent_decision(intent, journey, args, TEMPLATE_CONFIDENCE))
+        else:
+            # generate_query falls back to "<intent words> help"
+            index.add(compile_template(f"{intent.replace('_', ' ')} help"),
+                      lambda args, intent=intent, journey=journey: agent_decision(intent, journey, args, EXACT_CONFIDENCE))
+
+    # Greetings have query-independent answers: index each answer's salutation
+    # ("Hello", "Hi", ...) and the generator's "greeting help" phrase
+    greetings = direct_answers["greeting"]
+    for answer in greetings:
+        index.add(compile_template(answer.split("!")[0]), lambda args, answer=answer: greeting_decision(answer))
+    index.add(compile_template("greeting help"), lambda args: greeting_decision(greetings[0]))
+    return index
+
+# Bounded LRU cache whose entries also expire ttl seconds after insertion
+class TTLCache:
+    def __init__(self, maxsize=4096, ttl=600.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires <= self.clock():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = (value, self.clock() + self.ttl)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+# Stand-in for the Tier-1 GGUF: a fixed general_qa decision after an optional delay
+class StubModel:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, query):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            "intent": "general_query",
+            "primary_journey": "general_qa",
+            "journeys": ["general_qa"],
+            "needs_tools": False,
+            "tool": None,
+            "arguments": {},
+            "missing_fields": [],
+            "needs_clarification": False,
+            "clarification": None,
+            "complexity_score": 50,
+            "routing_confidence": 0.8,
+            "formatting_style": "concise_friendly",
+            "response_template": None,
+        }
+
+# Model decisions that answer the query itself are not reused: a math answer
+# is only right for the exact expression it was computed from
+def cacheable(decision):
+    return not (decision.get("direct_answer") is not None and decision.get("primary_journey") == "math_solver")
+
+# Router front-end: cache, then the query index, then the model.
+# Index decisions are cached without their arguments, which are re-read from
+# each query. Returned model decisions are shared with the cache; treat them as
+# read-only.
+class FastPathRouter:
+    def __init__(self, model, index=None, cache_size=4096, ttl=600.0, clock=time.monotonic):
+        self.model = model
+        self.index = index if index is not None else build_index()
+        self.cache = TTLCache(cache_size, ttl, clock)
+
+    def route(self, query):
+        key = normalize(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            decision, names, spans = cached
+            if names:
+                decision = dict(decision, arguments=slot_arguments(query, names, spans))
+            return decision, "cache"
+        found = self.index.match(query)
+        if found is not None:
+            build, names, spans = found
+            decision = build({})
+            self.cache.put(key, (decision, names, spans))
+            if names:
+                decision = dict(decision, arguments=slot_arguments(query, names, spans))
+            return decision, "index"
+        decision = self.model(query)
+        if cacheable(decision):
+            self.cache.put(key, (decision, [], []))
+        return decision, "model"
+
+# Queries from a log: one per line, either plain text or a messages row
+def read_query_log(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    messages = json.loads(line)["messages"]
+                    yield next(m["content"] for m in messages if m["role"] == "user")
+                    continue
+                except (ValueError, KeyError, StopIteration):
+                    pass
+            yield line
+
+# Places outside the generator's topic list, for travel queries in the synthetic log
+places = ["Berlin", "London", "Tokyo", "New York", "San Francisco", "NYC", "the airport", "the office", "home", "work", "Central Station"]
+
+# Agent templates whose slots all follow a place word ("Taxi from {} to {}")
+def place_templates():
+    return [template for templates in query_templates.values() for template in templates
+            if all(name in ("from", "to", "location") for name in slot_names(compile_template(template)))
+            and "{}" in template]
+
+# Synthetic log: Tier-1 generator queries mixed with open-ended Tier-2 questions
+# and travel queries naming real places
+def synthetic_queries(count, seed, open_ended=0.3, travel=0.1):
+    rng = random.Random(seed)
+    topics = list(topics_explanations)
+    templates = list(reasoning_templates.values())
+    travel_templates = place_templates()
+    for _ in range(count):
+        draw = rng.random()
+        if draw < open_ended:
+            yield rng.choice(templates).format(rng.choice(topics))
+        elif draw < open_ended + travel:
+            template = rng.choice(travel_templates)
+            yield template.format(*rng.sample(places, template.count("{}")))
+        else:
+            yield generate_entry(rng)["messages"][1]["content"]
+
+# Fast-path expectations checked on every run: (query, intent, arguments), with
+# intent None for queries that must go to the model
+route_checks = [
+    ("Book Uber to Berlin", "ride_booking", {"to": "Berlin"}),
+    ("Book Uber to the airport", "ride_booking", {"to": "the airport"}),
+    ("Taxi from home to work", "ride_booking", {"from": "home", "to": "work"}),
+    ("Flights from NYC to London", "flight_search", {"from": "NYC", "to": "London"}),
+    ("Book hotel in New York", "hotel_booking", {"location": "New York"}),
+    ("Plan a trip to San Francisco", "complex_planning", {"to": "San Francisco"}),
+    ("YouTube Paris", "youtube_search", {"topic": "Paris"}),
+    ("YouTube is down again", None, None),
+    ("Calculate 2+2", None, None),
+    ("Book Uber to the other side of town", None, None),
+]
+
+def check_routes(index):
+    failures = 0
+    for query, intent, arguments in route_checks:
+        decision = index.lookup(query)
+        got = (decision["intent"], decision["arguments"]) if decision else (None, None)
+        if got != (intent, arguments):
+            failures += 1
+            print(f"FAIL: {query!r} routed to {got}, expected {(intent, arguments)}")
+    return failures
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def replay(router, queries):
+    sources = Counter()
+    latencies = {"cache": [], "index": [], "model": []}
+    for query in queries:
+        start = time.perf_counter_ns()
+        _, source = router.route(query)
+        latencies[source].append(time.perf_counter_ns() - start)
+        sources[source] += 1
+    return sources, {source: sorted(values) for source, values in latencies.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a query log through the Tier-1 fast path (index + LRU/TTL cache) in front of a stub model")
+    parser.add_argument("--log", help="query log: one query per line, or messages JSONL")
+    parser.add_argument("--synthetic", type=int, default=100000, help="synthetic queries to replay when no --log is given")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic log")
+    parser.add_argument("--cache-size", type=int, default=4096, help="maximum cached decisions")
+    parser.add_argument("--ttl", type=float, default=600.0, help="cache entry lifetime in seconds")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="seconds the stub model sleeps per call")
+    args = parser.parse_args()
+
+    index = build_index()
+    queries = list(read_query_log(args.log) if args.log else synthetic_queries(args.synthetic, args.seed))
+    model = StubModel(args.model_latency)
+    router = FastPathRouter(model, index, args.cache_size, args.ttl)
+    sources, latencies = replay(router, queries)
+
+    total = sum(sources.values())
+    fast = sources["cache"] + sources["index"]
+    print(f"Index shapes: {index.size}")
+    print(f"Queries replayed: {total}")
+    print(f"Fast-path hit rate: {fast / total:.1%} (cache {sources['cache']}, index {sources['index']}, model {sources['model']})" if total else "No queries")
+    for source, values in latencies.items():
+        if values:
+            print(f"  {source:5s} p50 {_percentile(values, 0.5) / 1000:8.1f} us   p95 {_percentile(values, 0.95) / 1000:8.1f} us")
+
+    # Every decision the index can produce must satisfy the router contract
+    invalid = 0
+    for query in set(queries):
+        decision = index.lookup(query)
+        if decision is not None and validate(json.dumps(decision)).status != "complete":
+            invalid += 1
+            print(f"FAIL: non-conformant fast-path decision for {query!r}")
+    if invalid:
+        raise SystemExit(f"{invalid} non-conformant decisions")
+    failures = check_routes(index)
+    if failures:
+        raise SystemExit(f"{failures} fast-path route checks failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+import argparse
+import json
+import os
+import random
+import time
+
+from generate_dataset_tier_1 import generate_entry
+
+FORMAT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "format.json")
+
+WHITESPACE = " \t\n\r"
+DIGITS = "0123456789"
+
+# Field types
+STRING = "string"
+NULLABLE_STRING = "nullable_string"
+BOOLEAN = "boolean"
+SCORE = "score"            # integer 0-100
+CONFIDENCE = "confidence"  # number 0-1
+STRING_LIST = "string_list"
+ARGUMENTS = "arguments"    # object of string keys to JSON scalars
+
+# Keys the Tier-1 generator emits on top of format.json, and the field each follows
+GENERATOR_FIELDS = [
+    ("direct_answer", NULLABLE_STRING, "arguments"),
+    ("needs_execution", BOOLEAN, "clarification"),
+    ("execution_type", NULLABLE_STRING, "needs_execution"),
+]
+
+# format.json fields the generator does not emit yet
+OPTIONAL_FORMAT_FIELDS = {"needs_tools", "tool", "arguments", "response_template"}
+
+class SchemaError(ValueError):
+    pass
+
+# JSON objects in a file that uses // line comments
+def read_commented_json(path):
+    with open(path, encoding="utf-8") as f:
+        text = "\n".join(line for line in f.read().splitlines() if not line.strip().startswith("//"))
+    decoder = json.JSONDecoder()
+    objects, pos = [], 0
+    while True:
+        while pos < len(text) and text[pos] in WHITESPACE:
+            pos += 1
+        if pos == len(text):
+            return objects
+        obj, pos = decoder.raw_decode(text, pos)
+        objects.append(obj)
+
+def _field_type(placeholder):
+    if isinstance(placeholder, bool):
+        return BOOLEAN
+    if isinstance(placeholder, int):
+        return SCORE
+    if isinstance(placeholder, float):
+        return CONFIDENCE
+    if isinstance(placeholder, list):
+        return STRING_LIST
+    if isinstance(placeholder, dict):
+        return ARGUMENTS
+    return NULLABLE_STRING if "or_null" in placeholder else STRING
+
+# Schema: ordered list of (name, type, required), compiled from the main block of
+# format.json plus the generator's extra keys
+def load_router_schema(path=FORMAT_PATH):
+    main_format = read_commented_json(path)[0]
+    fields = [(name, _field_type(value), name not in OPTIONAL_FORMAT_FIELDS) for name, value in main_format.items()]
+    for name, field_type, after in GENERATOR_FIELDS:
+        position = next(i for i, field in enumerate(fields) if field[0] == after) + 1
+        fields.insert(position, (name, field_type, False))
+    return fields
+
+# Character-at-a-time validator. feed() returns "partial", "complete" or "rejected";
+# a bad prefix is rejected on the character that makes it impossible, and "complete"
+# is reported on the closing brace so decoding can stop there.
+class RouterStreamValidator:
+    def __init__(self, schema=None, ordered=False):
+        self.schema = schema if schema is not None else load_router_schema()
+        self.ordered = ordered
+        self.status = "partial"
+        self.error = None
+        self.position = 0
+        self._parser = self._document()
+        next(self._parser)
+
+    def feed(self, text):
+        for ch in text:
+            if self.status == "rejected":
+                break
+            try:
+                self._parser.send(ch)
+            except SchemaError as exc:
+                self.status = "rejected"
+                self.error = f"{exc} at character {self.position}"
+                break
+            self.position += 1
+        return self.status
+
+    def _skip_ws(self, ch):
+        while ch is None or ch in WHITESPACE:
+            ch = yield
+        return ch
+
+    def _document(self):
+        ch = yield from self._skip_ws(None)
+        if ch != "{":
+            raise SchemaError("expected '{'")
+        yield from self._router_object()
+        self.status = "complete"
+        while True:
+            ch = yield
+            if ch not in WHITESPACE:
+                raise SchemaError("unexpected data after the complete object")
+
+    def _router_object(self):
+        types = {name: field_type for name, field_type, _ in self.schema}
+        order = [name for name, _, _ in self.schema]
+        required = {name for name, _, is_required in self.schema if is_required}
+        seen = set()
+        last = -1
+        ch = yield from self._skip_ws(None)
+        while True:
+            if ch == "}":
+                missing = [name for name in order if name in required and name not in seen]
+                if missing:
+                    raise SchemaError(f"missing required fields {missing}")
+                return
+            if ch != '"':
+                raise SchemaError("expected a field name")
+            if self.ordered:
+                candidates = []
+                for name in order[last + 1:]:
+                    candidates.append(name)
+                    if name in required:
+                        break
+            else:
+                candidates = [name for name in order if name not in seen]
+            name = yield from self._key(candidates)
+            seen.add(name)
+            last = order.index(name)
+            ch = yield from self._skip_ws(None)
+            if ch != ":":
+                raise SchemaError("expected ':'")
+            ch = yield from self._value(types[name])
+            ch = yield from self._skip_ws(ch)
+            if ch == ",":
+                ch = yield from self._skip_ws(None)
+                if ch == "}":
+                    raise SchemaError("trailing comma")
+            elif ch != "}":
+                raise SchemaError("expected ',' or '}'")
+
+    # A field name, checked against the allowed names as each character arrives
+    def _key(self, candidates):
+        prefix = ""
+        while True:
+            ch = yield
+            if ch == '"':
+                if prefix in candidates:
+                    return prefix
+                raise SchemaError(f"unexpected field {prefix!r}")
+            prefix += ch
+            if not any(name.startswith(prefix) for name in candidates):
+                raise SchemaError(f"unexpected field starting {prefix!r}")
+
+    # Parse one value; returns the character after it if one had to be read, else None
+    def _value(self, field_type):
+        ch = yield from self._skip_ws(None)
+        if field_type == STRING:
+            if ch != '"':
+                raise SchemaError("expected a string")
+            yield from self._string()
+        elif field_type == NULLABLE_STRING:
+            if ch == "n":
+                yield from self._literal("ull")
+            elif ch == '"':
+                yield from self._string()
+            else:
+                raise SchemaError("expected a string or null")
+        elif field_type == BOOLEAN:
+            if ch == "t":
+                yield from self._literal("rue")
+            elif ch == "f":
+                yield from self._literal("alse")
+            else:
+                raise SchemaError("expected true or false")
+        elif field_type == SCORE:
+            return (yield from self._score(ch))
+        elif field_type == CONFIDENCE:
+            return (yield from self._confidence(ch))
+        elif field_type == STRING_LIST:
+            yield from self._string_list(ch)
+        elif field_type == ARGUMENTS:
+            yield from self._arguments(ch)
+        return None
+
+    def _literal(self, rest):
+        for expected in rest:
+            ch = yield
+            if ch != expected:
+                raise SchemaError(f"invalid literal, expected {expected!r}")
+
+    def _string(self):
+        while True:
+            ch = yield
+            if ch == '"':
+                return
+            if ch == "\\":
+                ch = yield
+                if ch == "u":
+                    for _ in range(4):
+                        ch = yield
+                        if ch not in "0123456789abcdefABCDEF":
+                            raise SchemaError("invalid \\u escape")
+                elif ch not in '"\\/bfnrt':
+                    raise SchemaError("invalid escape")
+            elif ch < " ":
+                raise SchemaError("control character in string")
+
+    # Integer 0-100 without leading zeros
+    def _score(self, ch):
+        if ch == "0":
+            ch = yield
+            if ch in DIGITS or ch in ".eE":
+                raise SchemaError("complexity_score must be an integer from 0 to 100")
+            return ch
+        if ch not in DIGITS:
+            raise SchemaError("expected an integer")
+        value = int(ch)
+        while True:
+            ch = yield
+            if ch in DIGITS:
+                value = value * 10 + int(ch)
+                if value > 100:
+                    raise SchemaError("score above 100")
+            elif ch in ".eE":
+                raise SchemaError("complexity_score must be an integer from 0 to 100")
+            else:
+                return ch
+
+    # Number 0-1: "0", "0.ddd", "1" or "1.000"
+    def _confidence(self, ch):
+        if ch not in "01":
+            raise SchemaError("confidence must be between 0 and 1")
+        whole = ch
+        ch = yield
+        if ch in DIGITS:
+            raise SchemaError("confidence must be between 0 and 1")
+        if ch != ".":
+            if ch in "eE":
+                raise SchemaError("exponents are not allowed")
+            return ch
+        ch = yield
+        if ch not in DIGITS:
+            raise SchemaError("expected a digit after '.'")
+        while ch in DIGITS:
+            if whole == "1" and ch != "0":
+                raise SchemaError("confidence must be between 0 and 1")
+            ch = yield
+        if ch in "eE":
+            raise SchemaError("exponents are not allowed")
+        return ch
+
+    def _string_list(self, ch):
+        if ch != "[":
+            raise SchemaError("expected a list of strings")
+        ch = yield from self._skip_ws(None)
+        if ch == "]":
+            return
+        while True:
+            if ch != '"':
+                raise SchemaError("expected a string")
+            yield from self._string()
+            ch = yield from self._skip_ws(None)
+            if ch == "]":
+                return
+            if ch != ",":
+                raise SchemaError("expected ',' or ']'")
+            ch = yield from self._skip_ws(None)
+
+    def _arguments(self, ch):
+        if ch != "{":
+            raise SchemaError("expected an arguments object")
+        keys = set()
+        ch = yield from self._skip_ws(None)
+        if ch == "}":
+            return
+        while True:
+            if ch != '"':
+                raise SchemaError("expected an argument name")
+            key = []
+            while True:
+                ch = yield
+                if ch == '"':
+                    break
+                if ch == "\\" or ch < " ":
+                    raise SchemaError("argument names must be plain text")
+                key.append(ch)
+            key = "".join(key)
+            if key in keys:
+                raise SchemaError(f"duplicate argument {key!r}")
+            keys.add(key)
+            ch = yield from self._skip_ws(None)
+            if ch != ":":
+                raise SchemaError("expected ':'")
+            ch = yield from self._scalar()
+            ch = yield from self._skip_ws(ch)
+            if ch == "}":
+                return
+            if ch != ",":
+                raise SchemaError("expected ',' or '}'")
+            ch = yield from self._skip_ws(None)
+
+    # Argument value: string, number, true, false or null
+    def _scalar(self):
+        ch = yield from self._skip_ws(None)
+        if ch == '"':
+            yield from self._string()
+            return None
+        if ch == "n":
+            yield from self._literal("ull")
+            return None
+        if ch == "t":
+            yield from self._literal("rue")
+            return None
+        if ch == "f":
+            yield from self._literal("alse")
+            return None
+        return (yield from self._number(ch))
+
+    # JSON number
+    def _number(self, ch):
+        if ch == "-":
+            ch = yield
+        if ch == "0":
+            ch = yield
+        elif ch in DIGITS:
+            while ch in DIGITS:
+                ch = yield
+        else:
+            raise SchemaError("expected a value")
+        if ch == ".":
+            ch = yield
+            if ch not in DIGITS:
+                raise SchemaError("expected a digit after '.'")
+            while ch in DIGITS:
+                ch = yield
+        if ch in "eE":
+            ch = yield
+            if ch in "+-":
+                ch = yield
+            if ch not in DIGITS:
+                raise SchemaError("expected an exponent")
+            while ch in DIGITS:
+                ch = yield
+        return ch
+
+def validate(text, schema=None, ordered=False):
+    validator = RouterStreamValidator(schema, ordered)
+    validator.feed(text)
+    return validator
+
+# GBNF rules per field type (same JSON subset the validator accepts)
+_GBNF_TYPES = {
+    STRING: "string",
+    NULLABLE_STRING: "( string | \"null\" )",
+    BOOLEAN: "boolean",
+    SCORE: "score",
+    CONFIDENCE: "confidence",
+    STRING_LIST: "string-list",
+    ARGUMENTS: "arguments",
+}
+
+_GBNF_COMMON = r'''string ::= "\"" ( [^"\\\x7F\x00-\x1F] | "\\" ( ["\\/bfnrt] | "u" [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F] ) )* "\""
+boolean ::= "true" | "false"
+score ::= "100" | [1-9] [0-9]? | "0"
+confidence ::= "0" ( "." [0-9]+ )? | "1" ( "." "0"+ )?
+string-list ::= "[" ws ( string ws ( "," ws string ws )* )? "]"
+arguments ::= "{" ws ( string ws ":" ws scalar ws ( "," ws string ws ":" ws scalar ws )* )? "}"
+scalar ::= string | number | "true" | "false" | "null"
+number ::= "-"? ( "0" | [1-9] [0-9]* ) ( "." [0-9]+ )? ( [eE] [-+]? [0-9]+ )?
+ws ::= [ \t\n\r]*
+'''
+
+# llama.cpp grammar for the same contract. Grammars fix the key order, so this
+# matches RouterStreamValidator(ordered=True): fields in schema order, optional ones skippable.
+def to_gbnf(schema=None):
+    schema = schema if schema is not None else load_router_schema()
+    if not schema[0][2]:
+        raise ValueError("the first schema field must be required")
+    rules = []
+    body = []
+    for i, (name, field_type, required) in enumerate(schema):
+        rule = "kv-" + name.replace("_", "-")
+        rules.append(f'{rule} ::= "\\"{name}\\"" ws ":" ws {_GBNF_TYPES[field_type]} ws')
+        if i == 0:
+            body.append(rule)
+        elif required:
+            body.append(f'"," ws {rule}')
+        else:
+            body.append(f'( "," ws {rule} )?')
+    root = 'root ::= ws "{" ws ' + " ".join(body) + ' "}" ws'
+    return "\n".join([root] + rules) + "\n" + _GBNF_COMMON
+
+# Router outputs to validate: generator rows plus the examples in format.json
+def corpus(rows, seed):
+    rng = random.Random(seed)
+    for _ in range(rows):
+        yield generate_entry(rng)["messages"][2]["content"]
+    for example in read_commented_json(FORMAT_PATH)[1:]:
+        yield json.dumps(example["output"])
+
+# Prefixes that must be rejected, with the index of the character that should trip it
+REJECT_CASES = [
+    ('{"intnet": "x"', 5),
+    ('{"intent": 3', 11),
+    ('{"intent": "a", "intent"', 17),
+    ('{"complexity_score": 101', 23),
+    ('{"complexity_score": 07', 22),
+    ('{"routing_confidence": 1.5', 25),
+    ('{"routing_confidence": -0.2', 23),
+    ('{"journeys": ["a", 1', 19),
+    ('{"needs_clarification": yes', 24),
+    ('{"intent": "a"}', 14),
+]
+
+def run_corpus(rows, seed, ordered):
+    schema = load_router_schema()
+    outputs = list(corpus(rows, seed))
+    failures = 0
+    chars = 0
+    start = time.perf_counter()
+    for text in outputs:
+        validator = RouterStreamValidator(schema, ordered)
+        # One character per feed, as a decoder emitting single-character tokens would
+        for i, ch in enumerate(text):
+            status = validator.feed(ch)
+            if status != "partial" and i < len(text) - 1:
+                break
+        if validator.status != "complete":
+            failures += 1
+            print(f"FAIL: {validator.error or 'incomplete'}: {text}")
+        chars += len(text)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in outputs:
+        json.loads(text)
+    json_elapsed = time.perf_counter() - start
+
+    print(f"Validated {len(outputs) - failures}/{len(outputs)} router outputs ({'ordered' if ordered else 'any key order'})")
+    print(f"Incremental validation: {elapsed / chars * 1e9:.0f} ns/char ({chars} chars)")
+    print(f"json.loads on complete strings: {json_elapsed / chars * 1e9:.1f} ns/char")
+
+    for text, expected in REJECT_CASES:
+        validator = validate(text, schema)
+        ok = validator.status == "rejected" and validator.position == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} reject {text!r}: {validator.error}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental validator for Tier-1 router JSON, with GBNF export")
+    parser.add_argument("--rows", type=int, default=10000, help="generator rows to validate")
+    parser.add_argument("--seed", type=int, default=0, help="generator seed")
+    parser.add_argument("--ordered", action="store_true", help="also require schema key order (as the GBNF grammar does)")
+    parser.add_argument("--gbnf", help="write the llama.cpp grammar to this path and exit")
+    args = parser.parse_args()
+
+    if args.gbnf:
+        with open(args.gbnf, "w") as f:
+            f.write(to_gbnf())
+        print(f"Wrote GBNF grammar to {args.gbnf}")
+        return
+
+    failures = run_corpus(args.rows, args.seed, args.ordered)
+    if failures:
+        raise SystemExit(f"{failures} failures")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+# On-disk layout for a dataset written to <prefix>:
+#   <prefix>.tokens  flat array of token ids (uint16 or uint32, see meta)
+#   <prefix>.idx     uint64 offsets into .tokens, one per sample plus a final end offset
+#   <prefix>.sys     uint32 system prompt id per sample (NO_SYSTEM if the row has none)
+#   <prefix>.json    metadata, including the system prompt dictionary
+# Sample i's conversation tokens are .tokens[idx[i]:idx[i + 1]]; its shared system
+# prompt is stored once in .tokens and referenced by id.
+FORMAT_VERSION = 1
+NO_SYSTEM = 0xFFFFFFFF
+
+Sample = namedtuple("Sample", ["system_id", "system_tokens", "tokens"])
+
+# ChatML rendering, as used by both Qwen 2.5 models
+def render_message(message):
+    return f"<|im_start|>{message['role']}\n{message['content']}<|im_end|>\n"
+
+def split_system(messages):
+    if messages and messages[0]["role"] == "system":
+        return messages[0]["content"], messages[1:]
+    return None, messages
+
+# Offline default: one token per UTF-8 byte plus the ChatML special tokens
+class ByteTokenizer:
+    name = "byte"
+    special_tokens = {"<|im_start|>": 256, "<|im_end|>": 257, "<|endoftext|>": 258}
+    vocab_size = 259
+
+    def __init__(self):
+        self._special = re.compile("(" + "|".join(re.escape(t) for t in self.special_tokens) + ")")
+        self._decode_special = {v: k for k, v in self.special_tokens.items()}
+
+    def encode(self, text):
+        ids = []
+        for part in self._special.split(text):
+            if part in self.special_tokens:
+                ids.append(self.special_tokens[part])
+            elif part:
+                ids.extend(part.encode("utf-8"))
+        return ids
+
+    def decode(self, ids):
+        out, pending = [], bytearray()
+        for i in ids:
+            if i < 256:
+                pending.append(i)
+                continue
+            out.append(pending.decode("utf-8", errors="replace"))
+            pending = bytearray()
+            out.append(self._decode_special[i])
+        out.append(pending.decode("utf-8", errors="replace"))
+        return "".join(out)
+
+# Hugging Face tokenizer (e.g. "hf:Qwen/Qwen2.5-1.5B"); transformers is only needed here
+class HFTokenizer:
+    def __init__(self, model_name):
+        try:
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise ImportError("HF tokenizers require the transformers package: pip install transformers") from None
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.name = f"hf:{model_name}"
+        self.vocab_size = len(self._tokenizer)
+
+    def encode(self, text):
+        return self._tokenizer.encode(text, add_special_tokens=False)
+
+    def decode(self, ids):
+        return self._tokenizer.decode(list(ids))
+
+def get_tokenizer(spec="byte"):
+    if spec == "byte":
+        return ByteTokenizer()
+    if spec.startswith("hf:"):
+        return HFTokenizer(spec[3:])
+    raise ValueError(f"Unknown tokenizer {spec!r} (expected 'byte' or 'hf:<model>')")
+
+def _typecode(vocab_size):
+    return "H" if vocab_size <= 1 << 16 else "I"
+
+# Stream a messages JSONL file into the binary format; returns the metadata
+def convert(input_path, prefix, tokenizer=None):
+    tokenizer = tokenizer or ByteTokenizer()
+    typecode = _typecode(tokenizer.vocab_size)
+    system_ids = {}
+    system_prompts = []
+    offset = 0
+    samples = 0
+
+    with open(input_path, encoding="utf-8") as src, \
+            open(prefix + ".tokens", "wb") as tokens_out, \
+            open(prefix + ".idx", "wb") as idx_out, \
+            open(prefix + ".sys", "wb") as sys_out:
+        for line_number, line in enumerate(src, 1):
+            if not line.strip():
+                continue
+            try:
+                messages = json.loads(line)["messages"]
+            except (ValueError, KeyError) as exc:
+                raise ValueError(f"{input_path}:{line_number}: not a messages row ({exc})") from None
+
+            system, rest = split_system(messages)
+            system_id = NO_SYSTEM
+            if system is not None:
+                system_id = system_ids.get(system)
+                if system_id is None:
+                    # First sighting: store the prompt's tokens once, outside any sample
+                    ids = array(typecode, tokenizer.encode(render_message({"role": "system", "content": system})))
+                    tokens_out.write(ids.tobytes())
+                    system_id = system_ids[system] = len(system_prompts)
+                    system_prompts.append({"text": system, "offset": offset, "length": len(ids)})
+                    offset += len(ids)
+
+            ids = array(typecode, tokenizer.encode("".join(render_message(m) for m in rest)))
+            tokens_out.write(ids.tobytes())
+            idx_out.write(array("Q", [offset]).tobytes())
+            sys_out.write(array("I", [system_id]).tobytes())
+            offset += len(ids)
+            samples += 1
+
+        idx_out.write(array("Q", [offset]).tobytes())
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "tokenizer": tokenizer.name,
+        "vocab_size": tokenizer.vocab_size,
+        "typecode": typecode,
+        "byteorder": sys.byteorder,
+        "num_samples": samples,
+        "num_tokens": offset,
+        "system_prompts": system_prompts,
+    }
+    with open(prefix + ".json", "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def _map(path, typecode):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None, memoryview(array(typecode))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, memoryview(mapped).cast(typecode)
+
+# Memory-mapped reader: opening costs a metadata read, samples are zero-copy views
+class TokenizedDataset:
+    def __init__(self, prefix):
+        with open(prefix + ".json") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{prefix}: unsupported format version {self.meta.get('format_version')}")
+        if self.meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{prefix}: written on a {self.meta['byteorder']}-endian machine")
+
+        self._maps = []
+        self.tokens = self._open(prefix + ".tokens", self.meta["typecode"])
+        self.offsets = self._open(prefix + ".idx", "Q")
+        self.system_ids = self._open(prefix + ".sys", "I")
+        self.system_prompts = self.meta["system_prompts"]
+        self._system_tokens = [self.tokens[p["offset"]:p["offset"] + p["length"]] for p in self.system_prompts]
+
+    def _open(self, path, typecode):
+        mapped, view = _map(path, typecode)
+        if mapped is not None:
+            self._maps.append((mapped, view))
+        return view
+
+    def __len__(self):
+        return self.meta["num_samples"]
+
+    # Normalize a (possibly negative) sample index
+    def _index(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("sample index out of range")
+        return i
+
+    def __getitem__(self, i):
+        i = self._index(i)
+        system_id = self.system_ids[i]
+        system_tokens = self._system_tokens[system_id] if system_id != NO_SYSTEM else self.tokens[0:0]
+        return Sample(system_id, system_tokens, self.tokens[self.offsets[i]:self.offsets[i + 1]])
+
+    # Length of the full rendered conversation (system prompt included)
+    def sample_length(self, i):
+        i = self._index(i)
+        system_id = self.system_ids[i]
+        system_length = self.system_prompts[system_id]["length"] if system_id != NO_SYSTEM else 0
+        return system_length + self.offsets[i + 1] - self.offsets[i]
+
+    # Token ids of the full conversation (copies, unlike __getitem__)
+    def full_tokens(self, i):
+        sample = self[i]
+        return sample.system_tokens.tolist() + sample.tokens.tolist()
+
+    def close(self):
+        for view in self._system_tokens:
+            view.release()
+        self._system_tokens = []
+        self.tokens = self.offsets = self.system_ids = None
+        for mapped, view in self._maps:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # Sample views still held by the caller keep this mapping alive
+                pass
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert messages JSONL to a pre-tokenized, memory-mapped dataset and inspect it")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="tokenize a JSONL file")
+    convert_parser.add_argument("input", help="messages JSONL path")
+    convert_parser.add_argument("prefix", help="output prefix (writes .tokens/.idx/.sys/.json)")
+    convert_parser.add_argument("--tokenizer", default="byte", help="'byte' (default) or 'hf:<model name>'")
+
+    info_parser = commands.add_parser("info", help="print dataset metadata and load time")
+    info_parser.add_argument("prefix")
+
+    show_parser = commands.add_parser("show", help="decode one sample")
+    show_parser.add_argument("prefix")
+    show_parser.add_argument("index", type=int)
+    show_parser.add_argument("--tokenizer", default=None, help="defaults to the tokenizer recorded in the metadata")
+
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        start = time.perf_counter()
+        meta = convert(args.input, args.prefix, get_tokenizer(args.tokenizer))
+        elapsed = time.perf_counter() - start
+        print(f"Wrote {meta['num_samples']} samples ({meta['num_tokens']} tokens, {len(meta['system_prompts'])} shared system prompts) to {args.prefix}.* in {elapsed:.2f}s")
+    elif args.command == "info":
+        start = time.perf_counter()
+        dataset = TokenizedDataset(args.prefix)
+        elapsed = time.perf_counter() - start
+        meta = dataset.meta
+        print(f"Samples: {len(dataset)}")
+        print(f"Tokens: {meta['num_tokens']} ({meta['typecode']}, tokenizer {meta['tokenizer']})")
+        print(f"Shared system prompts: {len(meta['system_prompts'])}")
+        print(f"Opened in {elapsed * 1000:.2f} ms")
+        dataset.close()
+    else:
+        with TokenizedDataset(args.prefix) as dataset:
+            tokenizer = get_tokenizer(args.tokenizer or dataset.meta["tokenizer"])
+            print(tokenizer.decode(dataset.full_tokens(args.index)), end="")
+
+if __name__ == "__main__":
+    main()